@@ -1,19 +1,525 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+import time
+startup_clock = time.perf_counter()  # Taken before the heavy imports so the startup profile covers them
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for
 from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 import uuid
-import time
 from datetime import datetime
 import json
+from collections import OrderedDict, deque
 import os
+import secrets
+import functools
+import inspect
+import array
+import mmap
+import struct
+import sys
+import threading
+
+startup_profile = {}  # Phase name -> seconds spent while the module loads
+startup_last_mark = startup_clock
+
+def mark_startup(phase):
+    global startup_last_mark
+    now = time.perf_counter()
+    startup_profile[phase] = round(now - startup_last_mark, 6)
+    startup_last_mark = now
+
+mark_startup('imports')
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 socketio = SocketIO(app, cors_allowed_origins="*")
+mark_startup('app_setup')
 
 # Global storage for game rooms
 game_rooms = {}
 player_sessions = {}
 socket_sessions = {}  # Maps socket IDs to player IDs
+session_tokens = {}  # Maps reconnect tokens to player IDs
+player_tokens = {}  # Maps player IDs to their reconnect token
+disconnected_players = {}  # Maps player IDs to the time their socket dropped
+brackets = {}  # Multi-room tournament brackets by ID
+
+# Reconnect settings
+RECONNECT_GRACE_SECONDS = float(os.environ.get('RECONNECT_GRACE_SECONDS', 30))
+MOVE_LOG_SIZE = 512  # Moves kept per room for reconnect catch-up
+
+# Admin settings
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')  # Admin endpoints are disabled when unset
+BULK_MAX_ROOMS = int(os.environ.get('BULK_MAX_ROOMS', 10000))
+
+# Bracket settings
+MATCH_NO_SHOW_SECONDS = float(os.environ.get('MATCH_NO_SHOW_SECONDS', 300))  # Unstarted matches become walkovers after this, 0 disables
+MATCH_CLOSE_DELAY_SECONDS = 10  # Decided match rooms stay open this long so players see the result
+MAX_SWISS_ROUNDS = 20
+
+# Profiling settings
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+PROFILE_MAX_SECONDS = 30  # Hard cap so a forgotten toggle can't keep sampling
+PROFILE_TOP_N = 20
+
+# Outbound queue settings
+OUTBOUND_QUEUE_LIMIT = int(os.environ.get('OUTBOUND_QUEUE_LIMIT', 64))  # Packets waiting in a connection's transport
+SLOW_CONSUMER_SECONDS = float(os.environ.get('SLOW_CONSUMER_SECONDS', 5))  # Over the limit this long -> snapshot mode
+EVICT_SECONDS = float(os.environ.get('EVICT_SECONDS', 30))  # Further time over the limit before disconnecting
+SNAPSHOT_INTERVAL_SECONDS = 2.0
+OUTBOUND_FLUSH_INTERVAL = 0.05
+
+# Move analytics settings
+PACE_HALF_LIFE_SECONDS = 5.0  # How quickly the decayed pace forgets older moves
+
+# Room ID settings
+ROOM_ID_ALPHABET = '0123456789abcdefghjkmnpqrstvwxyz'  # 32 URL-safe characters, no look-alikes
+ROOM_ID_LENGTH = 8
+ROOM_ID_WORKER = os.environ.get('ROOM_ID_WORKER')  # Distinct per worker (0-1023) for cross-worker uniqueness
+ROOM_ID_BATCH_SIZE = 4096
+
+# State snapshot settings
+SNAPSHOT_PATH = os.environ.get('SNAPSHOT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'state_snapshot.bin'))
+SNAPSHOT_MAGIC = b'HNSS'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_FORK = os.environ.get('SNAPSHOT_FORK', 'True').lower() == 'true'
+RESTORE_ON_BOOT = os.environ.get('RESTORE_ON_BOOT', 'True').lower() == 'true'
+STATE_SNAPSHOT_INTERVAL = float(os.environ.get('STATE_SNAPSHOT_INTERVAL', 0))  # Seconds between background snapshots, 0 disables
+
+# Static bundle settings
+STATIC_BUNDLE = os.environ.get('STATIC_BUNDLE', 'True').lower() == 'true'
+STATIC_MAX_AGE = 31536000  # For asset URLs carrying the current content version, which never go stale
+STARTUP_PROFILE = os.environ.get('STARTUP_PROFILE', 'False').lower() == 'true'
+
+# Precomputed state-space index settings
+INDEX_DIR = os.environ.get('HANOI_INDEX_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hanoi_index'))
+INDEX_MAX_DISKS = min(int(os.environ.get('HANOI_INDEX_MAX_DISKS', 12)), 16)  # uint16 distances
+INDEX_MAGIC = b'HNOI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sBBcx')  # magic, version, disk count, byte order
+NO_MOVE = 255  # Stored as the best move for the goal position
+
+# Game settings
+MIN_DISKS = 1
+MAX_DISKS = int(os.environ.get('MAX_DISKS', 12))  # Requested disk counts are clamped to this
+
+class StateIndex:
+    """Distance-to-goal and best next move for every position of one disk count.
+
+    A position is addressed by its perfect hash: disk ``d`` (0 = smallest)
+    sitting on peg ``p`` contributes ``p * 3**d``, so the 3^N positions map
+    one-to-one onto ``0 .. 3^N - 1``. The goal is every disk on peg 2.
+    """
+
+    def __init__(self, disk_count, distances, moves, backing=None):
+        self.disk_count = disk_count
+        self.distances = distances  # uint16 per position
+        self.moves = moves          # uint8 per position: from_peg * 3 + to_peg
+        self.backing = backing      # mmap kept alive for the memoryviews
+
+    def lookup(self, position):
+        move = self.moves[position]
+        best_move = None if move == NO_MOVE else (move // 3, move % 3)
+        return self.distances[position], best_move
+
+def position_hash(pegs, disk_count):
+    """Perfect hash of a peg state given as three bottom-to-top lists of disk sizes (1 = smallest)."""
+    if not isinstance(pegs, (list, tuple)) or len(pegs) != 3:
+        return None
+
+    disk_pegs = [None] * disk_count
+    for peg_index, peg in enumerate(pegs):
+        if not isinstance(peg, (list, tuple)):
+            return None
+        previous_size = disk_count + 1
+        for size in peg:
+            # Each disk must exist once and sit on a larger one
+            if not isinstance(size, int) or not 1 <= size <= disk_count:
+                return None
+            if disk_pegs[size - 1] is not None or size >= previous_size:
+                return None
+            disk_pegs[size - 1] = peg_index
+            previous_size = size
+
+    if None in disk_pegs:
+        return None
+
+    position = 0
+    for disk in range(disk_count - 1, -1, -1):
+        position = position * 3 + disk_pegs[disk]
+    return position
+
+def solve_position(position, disk_count, target=2):
+    """Direct O(N) solve for positions outside the precomputed range."""
+    distance = 0
+    best_move = None
+    disk_pegs = []
+    for _ in range(disk_count):
+        disk_pegs.append(position % 3)
+        position //= 3
+
+    for disk in range(disk_count - 1, -1, -1):
+        peg = disk_pegs[disk]
+        if peg == target:
+            continue
+        # Smaller disks must be parked on the spare peg before this one moves,
+        # so the smallest misplaced disk is the one to move first
+        distance += 1 << disk
+        best_move = (peg, target)
+        target = 3 - peg - target
+
+    return distance, best_move
+
+def build_state_index(disk_count):
+    """Build distance and best-move tables for all 3^N positions.
+
+    Tables for ``k`` disks are assembled from the ``k - 1`` disk tables for all
+    three targets: if the largest disk already sits on the target the answer is
+    the smaller tower's answer; otherwise the smaller tower must first reach the
+    spare peg, costing one extra move plus 2^(k-1) - 1 to finish.
+    """
+    distances = [[0], [0], [0]]
+    moves = [[NO_MOVE], [NO_MOVE], [NO_MOVE]]
+
+    for k in range(1, disk_count + 1):
+        block = 3 ** (k - 1)
+        finish = 1 << (k - 1)
+        new_distances = []
+        new_moves = []
+        for target in range(3):
+            dist_table = []
+            move_table = []
+            for top in range(3):
+                if top == target:
+                    dist_table.extend(distances[target])
+                    move_table.extend(moves[target])
+                    continue
+                spare = 3 - top - target
+                parked = spare * (block - 1) // 2  # All smaller disks on the spare peg
+                dist_table.extend(d + finish for d in distances[spare])
+                sub_moves = list(moves[spare])
+                sub_moves[parked] = top * 3 + target
+                move_table.extend(sub_moves)
+            new_distances.append(dist_table)
+            new_moves.append(move_table)
+        distances = new_distances
+        moves = new_moves
+
+    return distances[2], moves[2]
+
+def _index_path(disk_count):
+    return os.path.join(INDEX_DIR, f'{disk_count}.idx')
+
+def save_state_index(disk_count, distances, moves):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    path = _index_path(disk_count)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    byte_order = b'<' if sys.byteorder == 'little' else b'>'
+
+    with open(tmp_path, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, disk_count, byte_order))
+        array.array('H', distances).tofile(f)
+        f.write(bytes(moves))
+
+    # Atomic rename so concurrent workers never map a half-written file
+    os.replace(tmp_path, path)
+    return path
+
+def load_state_index(disk_count):
+    path = _index_path(disk_count)
+    try:
+        with open(path, 'rb') as f:
+            backing = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    size = 3 ** disk_count
+    expected = INDEX_HEADER.size + size * 3
+    byte_order = b'<' if sys.byteorder == 'little' else b'>'
+    if len(backing) != expected:
+        backing.close()
+        return None
+    magic, version, stored_count, stored_order = INDEX_HEADER.unpack_from(backing, 0)
+    if (magic != INDEX_MAGIC or version != INDEX_VERSION or
+            stored_count != disk_count or stored_order != byte_order):
+        backing.close()
+        return None
+
+    view = memoryview(backing)
+    distances = view[INDEX_HEADER.size:INDEX_HEADER.size + size * 2].cast('H')
+    moves = view[INDEX_HEADER.size + size * 2:]
+    return StateIndex(disk_count, distances, moves, backing)
+
+state_indexes = {}  # disk_count -> StateIndex
+state_index_lock = threading.Lock()
+
+def get_state_index(disk_count):
+    """Return the index for ``disk_count``, building and saving it on first use."""
+    if not isinstance(disk_count, int) or not 1 <= disk_count <= INDEX_MAX_DISKS:
+        return None
+
+    index = state_indexes.get(disk_count)
+    if index:
+        return index
+
+    with state_index_lock:
+        index = state_indexes.get(disk_count)
+        if index:
+            return index
+
+        index = load_state_index(disk_count)
+        if index is None:
+            distances, moves = build_state_index(disk_count)
+            try:
+                save_state_index(disk_count, distances, moves)
+                index = load_state_index(disk_count)
+            except OSError as e:
+                print(f'Could not save state index for {disk_count} disks: {e}')
+            if index is None:
+                # Read-only filesystem: keep the tables in process memory
+                index = StateIndex(disk_count, distances, moves)
+
+        state_indexes[disk_count] = index
+        return index
+
+def preload_state_indexes():
+    # Map every index already on disk so forked workers share the pages
+    for disk_count in range(1, INDEX_MAX_DISKS + 1):
+        index = load_state_index(disk_count)
+        if index:
+            state_indexes[disk_count] = index
+
+def lookup_position_hash(position, disk_count):
+    index = get_state_index(disk_count)
+    if index:
+        return index.lookup(position)
+    return solve_position(position, disk_count)
+
+def lookup_position(pegs, disk_count):
+    """Return ``(moves_to_go, best_move)`` for a peg state, or ``None`` if invalid."""
+    position = position_hash(pegs, disk_count)
+    if position is None:
+        return None
+    return lookup_position_hash(position, disk_count)
+
+def position_progress(pegs, disk_count):
+    """Fraction of the optimal solution already covered by the current position."""
+    result = lookup_position(pegs, disk_count)
+    if result is None:
+        return None
+    optimal = (1 << disk_count) - 1
+    return 1 - result[0] / optimal if optimal else 1.0
+
+preload_state_indexes()
+mark_startup('state_index_preload')
+
+# Hint cache settings
+HINT_CACHE_SIZE = int(os.environ.get('HINT_CACHE_SIZE', 50000))
+
+class HintCache:
+    """Bounded LRU of hint answers keyed by ``(disk_count, position)``."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, disk_count, position):
+        key = (disk_count, position)
+        with self.lock:
+            hint = self.entries.get(key)
+            if hint is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return hint
+            self.misses += 1
+
+        moves_to_go, best_move = lookup_position_hash(position, disk_count)
+        hint = {
+            'moves_to_go': moves_to_go,
+            'best_move': {'from_peg': best_move[0], 'to_peg': best_move[1]} if best_move else None
+        }
+
+        with self.lock:
+            self.entries[key] = hint
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return hint
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+hint_cache = HintCache(HINT_CACHE_SIZE)
+
+def get_hint(room_id, pegs):
+    """Return ``(hint, error)`` for a peg state in the given room."""
+    if room_id not in game_rooms:
+        return None, 'Room not found'
+
+    disk_count = game_rooms[room_id].disk_count
+    if not isinstance(disk_count, int) or disk_count < 1:
+        return None, 'Invalid disk count'
+    position = position_hash(pegs, disk_count)
+    if position is None:
+        return None, 'Invalid peg state'
+
+    hint = hint_cache.get(disk_count, position)
+    return dict(hint, disk_count=disk_count), None
+
+class MoveAnalytics:
+    """Streaming per-player efficiency stats, updated in O(N) per move with constant memory.
+
+    The player's position is tracked from each move's pegs, so every move can
+    be checked against the optimal distance-to-goal. Moves reported without
+    pegs (or that don't replay cleanly) stop position tracking and leave only
+    the rate-based stats.
+    """
+
+    __slots__ = ('disk_count', 'optimal_moves', 'disk_pegs', 'position', 'distance', 'tracking',
+                 'moves', 'deviations', 'start_time', 'last_move_time', 'end_time', 'pace')
+
+    def __init__(self, disk_count, start_time):
+        self.disk_count = disk_count
+        self.optimal_moves = (1 << disk_count) - 1
+        self.disk_pegs = [0] * disk_count  # Every disk starts on the left peg
+        self.position = 0
+        self.distance = self.optimal_moves
+        self.tracking = True
+        self.moves = 0
+        self.deviations = 0  # Moves that did not bring the tower closer to the goal
+        self.start_time = start_time
+        self.last_move_time = start_time
+        self.end_time = None
+        self.pace = 0.0  # Exponentially decayed moves/sec
+
+    def record(self, moves, from_peg, to_peg, now):
+        # Decay the pace to now, then add this update's moves
+        delta = max(moves - self.moves, 0)
+        elapsed = max(now - self.last_move_time, 0)
+        self.pace = (self.pace * 0.5 ** (elapsed / PACE_HALF_LIFE_SECONDS) +
+                     delta * 0.6931471805599453 / PACE_HALF_LIFE_SECONDS)
+        self.last_move_time = now
+        self.moves = moves
+        
+        if self.tracking:
+            if delta == 1 and self.apply_move(from_peg, to_peg):
+                distance = lookup_position_hash(self.position, self.disk_count)[0]
+                if distance != self.distance - 1:
+                    self.deviations += 1
+                self.distance = distance
+            else:
+                self.tracking = False
+
+    def apply_move(self, from_peg, to_peg):
+        if from_peg not in (0, 1, 2) or to_peg not in (0, 1, 2) or from_peg == to_peg:
+            return False
+        
+        # Top disk of the source peg is the smallest disk on it
+        disk = next((d for d, peg in enumerate(self.disk_pegs) if peg == from_peg), None)
+        if disk is None or to_peg in self.disk_pegs[:disk]:
+            return False
+        
+        self.disk_pegs[disk] = to_peg
+        self.position += (to_peg - from_peg) * 3 ** disk
+        return True
+
+    def finish(self, now):
+        self.end_time = now
+
+    def to_snapshot(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_snapshot(cls, data, downtime):
+        analytics = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(analytics, name, data[name])
+        if analytics.end_time is None:
+            # The clock kept running while the server was down; don't count that time
+            analytics.start_time += downtime
+            analytics.last_move_time += downtime
+        return analytics
+
+    def get_stats(self, now=None):
+        now = self.end_time or now or time.time()
+        elapsed = max(now - self.start_time, 1e-6)
+        stats = {
+            'moves': self.moves,
+            'moves_per_sec': round(self.moves / elapsed, 3),
+            'pace': round(self.pace * 0.5 ** (max(now - self.last_move_time, 0) / PACE_HALF_LIFE_SECONDS), 3),
+            'optimal_moves': self.optimal_moves,
+            'tracking': self.tracking,
+            'moves_to_go': None,
+            'progress': None,
+            'optimality': None,
+            'wasted_moves': None,
+            'deviations': None
+        }
+        
+        if self.tracking:
+            # Moves that counted toward the solution versus moves made
+            useful_moves = self.optimal_moves - self.distance
+            stats.update({
+                'moves_to_go': self.distance,
+                'progress': round(useful_moves / self.optimal_moves, 4) if self.optimal_moves else 1.0,
+                'optimality': round(useful_moves / self.moves, 4) if self.moves else 1.0,
+                'wasted_moves': self.moves - useful_moves,
+                'deviations': self.deviations
+            })
+        return stats
+
+class RoomIdAllocator:
+    """Short, URL-safe room IDs drawn from a pre-generated pool.
+
+    IDs are generated a batch at a time from a single ``os.urandom`` read and
+    mapped onto a 32-character alphabet (the translate table maps exactly 8 of
+    the 256 byte values to each character, so there is no modulo bias). When
+    ``worker_id`` is set, the first two characters encode it, so workers never
+    hand out the same ID; without it, IDs are only unique within one process.
+    Each ID is checked against the live rooms before it is issued, which keeps
+    allocation O(1) no matter how many rooms exist.
+    """
+
+    def __init__(self, worker_id=None, length=ROOM_ID_LENGTH, batch_size=ROOM_ID_BATCH_SIZE):
+        self.prefix = ''
+        if worker_id is not None:
+            worker_id = int(worker_id)
+            if not 0 <= worker_id < len(ROOM_ID_ALPHABET) ** 2:
+                raise ValueError(f'Room ID worker must be between 0 and {len(ROOM_ID_ALPHABET) ** 2 - 1}')
+            self.prefix = ROOM_ID_ALPHABET[worker_id // 32] + ROOM_ID_ALPHABET[worker_id % 32]
+        self.random_length = length - len(self.prefix)
+        self.batch_size = batch_size
+        self.table = (ROOM_ID_ALPHABET * 8).encode('ascii')  # byte value -> ID character
+        self.pool = []
+        self.lock = threading.Lock()
+
+    def refill(self):
+        chars = os.urandom(self.batch_size * self.random_length).translate(self.table).decode('ascii')
+        n = self.random_length
+        self.pool = [self.prefix + chars[i:i + n] for i in range(0, len(chars), n)]
+
+    def allocate(self, in_use):
+        """Return an ID that is not a key of ``in_use``."""
+        with self.lock:
+            while True:
+                if not self.pool:
+                    self.refill()
+                room_id = self.pool.pop()
+                if room_id not in in_use:
+                    return room_id
+
+if ROOM_ID_WORKER is None and int(os.environ.get('WEB_CONCURRENCY', 1)) > 1:
+    # Several workers without a prefix each would hand out colliding room IDs
+    raise RuntimeError('Set ROOM_ID_WORKER to a distinct value (0-1023) for each worker when WEB_CONCURRENCY > 1')
+room_id_allocator = RoomIdAllocator(ROOM_ID_WORKER)
 
 class GameRoom:
     def __init__(self, room_id, creator_id, creator_name, game_mode='classic', max_players=2):
@@ -42,6 +548,10 @@ class GameRoom:
         self.created_at = datetime.now()
         self.disk_count = 4
         self.max_resets = 2
+        self.move_seq = 0
+        self.move_log = deque(maxlen=MOVE_LOG_SIZE)  # (seq, player_id, from_peg, to_peg)
+        self.bracket_match = None  # (bracket_id, match_id) for bracket tournament rooms
+        self.analytics = {}  # player_id -> MoveAnalytics for the current game
         
     def add_player(self, player_id, player_name, role='player', team=None):
         active_players = [p for p in self.players.values() if p['role'] == 'player']
@@ -130,7 +640,8 @@ class GameRoom:
             self.leaderboard = []
             
             # Reset player game states
-            for player in self.players.values():
+            self.analytics = {}
+            for player_id, player in self.players.items():
                 if player['role'] == 'player':
                     player['game_state'] = {
                         'moves': 0,
@@ -139,6 +650,7 @@ class GameRoom:
                         'finish_time': None
                     }
                     player['placement'] = None
+                    self.analytics[player_id] = MoveAnalytics(self.disk_count, player['game_state']['start_time'])
             return True
         return False
     
@@ -147,6 +659,8 @@ class GameRoom:
             self.players[player_id]['game_state']['finished'] = True
             self.players[player_id]['game_state']['moves'] = moves
             self.players[player_id]['game_state']['finish_time'] = finish_time
+            if player_id in self.analytics:
+                self.analytics[player_id].finish(time.time())
             
             # Handle different game modes
             if self.game_mode == 'tournament':
@@ -255,6 +769,7 @@ class GameRoom:
                     'finished': False,
                     'finish_time': None
                 }
+                self.analytics[player_id] = MoveAnalytics(self.disk_count, self.players[player_id]['game_state']['start_time'])
             return True
         return False
     
@@ -263,6 +778,71 @@ class GameRoom:
             return self.players[player_id]['resets_used'] < self.max_resets
         return False
     
+    def record_move(self, player_id, moves, from_peg=None, to_peg=None):
+        if self.players[player_id].get('game_state'):
+            self.players[player_id]['game_state']['moves'] = moves
+        # The count comes straight from the client; anything but a count is kept out of the analytics
+        valid_count = isinstance(moves, int) and not isinstance(moves, bool) and moves >= 0
+        if player_id in self.analytics and valid_count:
+            self.analytics[player_id].record(moves, from_peg, to_peg, time.time())
+        self.move_seq += 1
+        self.move_log.append((self.move_seq, player_id, from_peg, to_peg))
+        return self.move_seq
+    
+    def to_snapshot(self):
+        data = {name: value for name, value in vars(self).items() if name not in ('created_at', 'move_log', 'analytics')}
+        data['created_at'] = self.created_at.isoformat()
+        data['move_log'] = list(self.move_log)
+        data['analytics'] = {pid: analytics.to_snapshot() for pid, analytics in self.analytics.items()}
+        return data
+    
+    @classmethod
+    def from_snapshot(cls, data, downtime):
+        room = cls.__new__(cls)
+        for name, value in data.items():
+            setattr(room, name, value)
+        room.created_at = datetime.fromisoformat(data['created_at'])
+        room.move_log = deque((tuple(entry) for entry in data['move_log']), maxlen=MOVE_LOG_SIZE)
+        room.bracket_match = tuple(data['bracket_match']) if data['bracket_match'] else None
+        room.analytics = {pid: MoveAnalytics.from_snapshot(a, downtime) for pid, a in data['analytics'].items()}
+        
+        # Shift in-progress clocks past the downtime
+        for player in room.players.values():
+            game_state = player.get('game_state')
+            if game_state and not game_state['finished']:
+                game_state['start_time'] += downtime
+        return room
+    
+    def get_player_stats(self, player_id):
+        analytics = self.analytics.get(player_id)
+        return analytics.get_stats() if analytics else None
+    
+    def get_all_stats(self):
+        now = time.time()
+        return {pid: analytics.get_stats(now) for pid, analytics in self.analytics.items()}
+    
+    def get_moves_since(self, last_seq):
+        # Compact catch-up: latest count per player plus the peg steps still in the log
+        oldest_seq = self.move_log[0][0] if self.move_log else self.move_seq + 1
+        complete = last_seq + 1 >= oldest_seq
+        players = {
+            pid: {
+                'moves': pinfo['game_state']['moves'] if pinfo.get('game_state') else 0,
+                'steps': []
+            } for pid, pinfo in self.players.items()
+        }
+        
+        for seq, player_id, from_peg, to_peg in self.move_log:
+            if seq > last_seq and player_id in players and from_peg is not None:
+                players[player_id]['steps'].append([from_peg, to_peg])
+        
+        return {
+            'since_seq': last_seq,
+            'seq': self.move_seq,
+            'complete': complete,
+            'players': players
+        }
+    
     def get_room_info(self):
         return {
             'room_id': self.room_id,
@@ -294,34 +874,857 @@ class GameRoom:
             'spectator_count': len(self.spectators)
         }
 
+class TournamentBracket:
+    """Multi-room tournament: each match is a classic 1v1 GameRoom.
+
+    Matches are advanced one at a time as their rooms report a winner, so a
+    result only touches the match that finished and the match it feeds.
+    """
+
+    def __init__(self, bracket_id, entrant_names, bracket_format='single_elimination', disk_count=4, rounds=None):
+        self.bracket_id = bracket_id
+        self.format = bracket_format  # 'single_elimination' or 'swiss'
+        self.disk_count = disk_count
+        self.entrants = {}  # entrant_id -> {'name', 'seed', 'points', 'opponents', 'eliminated', 'match_id'}
+        self.seeds = []     # entrant_ids in seed order
+        for seed, name in enumerate(entrant_names, start=1):
+            entrant_id = secrets.token_urlsafe(8)
+            self.entrants[entrant_id] = {
+                'name': name,
+                'seed': seed,
+                'points': 0,
+                'opponents': [],
+                'had_bye': False,
+                'eliminated': False,
+                'match_id': None
+            }
+            self.seeds.append(entrant_id)
+        self.matches = {}        # match_id -> match dict
+        self.round_pending = {}  # round -> matches still running in that round
+        self.current_round = 0
+        self.total_rounds = max(1, (len(self.seeds) - 1).bit_length())
+        if bracket_format == 'swiss' and rounds:
+            self.total_rounds = rounds
+        self.finished = False
+        self.champion = None
+        self.created_at = datetime.now()
+
+    def start(self):
+        if self.format == 'swiss':
+            self.pair_swiss_round()
+        else:
+            self.build_elimination()
+
+    def new_match(self, round_number, index, entrant_ids):
+        match = {
+            'match_id': f'r{round_number}m{index}',
+            'round': round_number,
+            'entrants': list(entrant_ids),
+            'players': {},  # player_id -> entrant_id for the match room
+            'room_id': None,
+            'winner': None,
+            'status': 'waiting',  # 'waiting', 'playing', 'finished'
+            'started_at': None,   # When the room opened, for the no-show walkover
+            'next_match': None,
+            'next_slot': None
+        }
+        self.matches[match['match_id']] = match
+        return match
+
+    def build_elimination(self):
+        # Standard seeding so the top seeds get the byes and meet as late as possible
+        size = 1 << self.total_rounds
+        order = [1]
+        while len(order) < size:
+            order = [s for seed in order for s in (seed, 2 * len(order) + 1 - seed)]
+
+        for round_number in range(1, self.total_rounds + 1):
+            for index in range(size >> round_number):
+                match = self.new_match(round_number, index, [None, None])
+                if round_number < self.total_rounds:
+                    match['next_match'] = f'r{round_number + 1}m{index // 2}'
+                    match['next_slot'] = index % 2
+            self.round_pending[round_number] = size >> round_number
+
+        self.current_round = 1
+        for index in range(size >> 1):
+            match = self.matches[f'r1m{index}']
+            for slot, seed in enumerate(order[2 * index:2 * index + 2]):
+                if seed <= len(self.seeds):
+                    match['entrants'][slot] = self.seeds[seed - 1]
+
+            present = [e for e in match['entrants'] if e]
+            if len(present) == 2:
+                self.start_match(match)
+            else:
+                # Bye: the seeded entrant advances without playing
+                self.finish_match(match, present[0])
+
+    def pair_swiss_round(self):
+        self.current_round += 1
+        round_number = self.current_round
+        standings = sorted(self.seeds, key=lambda e: (-self.entrants[e]['points'], self.entrants[e]['seed']))
+
+        bye = None
+        if len(standings) % 2:
+            # Lowest-ranked entrant without a bye sits out for a free point
+            bye = next((e for e in reversed(standings) if not self.entrants[e]['had_bye']), standings[-1])
+            standings.remove(bye)
+
+        pairs = []
+        unpaired = standings
+        while unpaired:
+            first = unpaired[0]
+            # Closest-scored opponent they haven't met yet, else the next in line
+            opponent = next((e for e in unpaired[1:] if e not in self.entrants[first]['opponents']), unpaired[1])
+            pairs.append((first, opponent))
+            unpaired = [e for e in unpaired[1:] if e != opponent]
+
+        self.round_pending[round_number] = len(pairs) + (1 if bye else 0)
+        for index, pair in enumerate(pairs):
+            self.start_match(self.new_match(round_number, index, pair))
+        if bye:
+            self.entrants[bye]['had_bye'] = True
+            self.finish_match(self.new_match(round_number, len(pairs), [bye, None]), bye)
+
+    def start_match(self, match):
+        room_id = room_id_allocator.allocate(game_rooms)
+        player_ids = [str(uuid.uuid4()) for _ in match['entrants']]
+        names = [self.entrants[e]['name'] for e in match['entrants']]
+
+        room = GameRoom(room_id, player_ids[0], names[0], 'classic', 2)
+        room.add_player(player_ids[1], names[1])
+        room.disk_count = self.disk_count
+        room.bracket_match = (self.bracket_id, match['match_id'])
+        game_rooms[room_id] = room
+
+        match['room_id'] = room_id
+        match['status'] = 'playing'
+        match['started_at'] = time.time()
+        for player_id, entrant_id, opponent_id in zip(player_ids, match['entrants'], reversed(match['entrants'])):
+            player_sessions[player_id] = room_id
+            match['players'][player_id] = entrant_id
+            self.entrants[entrant_id]['match_id'] = match['match_id']
+            self.entrants[entrant_id]['opponents'].append(opponent_id)
+        for player_id, entrant_id in match['players'].items():
+            socketio.emit('match_assigned', self.get_assignment(match, player_id), room=f'entrant_{entrant_id}')
+
+    def get_assignment(self, match, player_id):
+        """What an entrant's client needs to take its seat in a running match."""
+        opponent_id = next(e for e in match['entrants'] if e != match['players'][player_id])
+        room = game_rooms.get(match['room_id'])
+        return {
+            'bracket_id': self.bracket_id,
+            'match_id': match['match_id'],
+            'round': match['round'],
+            'room_id': match['room_id'],
+            'player_id': player_id,
+            'host': bool(room) and room.creator_id == player_id,  # The host starts the game once both are ready
+            'opponent': self.entrants[opponent_id]['name'],
+            'invite_link': f'/room/{match["room_id"]}'
+        }
+
+    def expire_no_shows(self, now, present):
+        """Walk over running matches whose game didn't start in time; returns their room IDs.
+
+        ``present`` holds the player IDs with a live or held socket. The entrant
+        who turned up advances; if neither did, the higher seed does.
+        """
+        decided = []
+        for match in list(self.matches.values()):
+            if match['status'] != 'playing':
+                continue
+            room = game_rooms.get(match['room_id'])
+            if room and room.game_started:
+                continue
+            if match.get('started_at') is None:
+                match['started_at'] = now  # Restored from a snapshot that predates the timer
+            if now - match['started_at'] < MATCH_NO_SHOW_SECONDS:
+                continue
+            joined = [pid for pid in match['players'] if pid in present]
+            if len(joined) == 2:
+                continue
+            winner = joined[0] if joined else min(match['players'], key=lambda pid: self.entrants[match['players'][pid]]['seed'])
+            if room:
+                room.bracket_match = None  # Closing the room must not report a second result
+            self.report_result(match['match_id'], winner)
+            decided.append(match['room_id'])
+        return decided
+
+    def report_result(self, match_id, winner_player_id):
+        match = self.matches.get(match_id)
+        if not match or match['status'] == 'finished':
+            return False
+        winner = match['players'].get(winner_player_id)
+        if not winner:
+            return False
+        self.finish_match(match, winner)
+        return True
+
+    def finish_match(self, match, winner):
+        match['winner'] = winner
+        match['status'] = 'finished'
+        self.entrants[winner]['points'] += 1
+        for entrant_id in match['entrants']:
+            if entrant_id:
+                self.entrants[entrant_id]['match_id'] = None
+        self.round_pending[match['round']] -= 1
+
+        socketio.emit('bracket_update', {
+            'bracket_id': self.bracket_id,
+            'match': self.get_match_info(match)
+        }, room=f'bracket_{self.bracket_id}')
+
+        if self.format == 'swiss':
+            if self.round_pending[match['round']] == 0:
+                if self.current_round < self.total_rounds:
+                    self.pair_swiss_round()
+                else:
+                    self.finish_bracket(self.get_standings()[0]['entrant_id'])
+            return
+
+        for entrant_id in match['entrants']:
+            if entrant_id and entrant_id != winner:
+                self.entrants[entrant_id]['eliminated'] = True
+
+        if not match['next_match']:
+            self.finish_bracket(winner)
+            return
+
+        # Feed the winner forward; the next match starts once both feeders are done
+        next_match = self.matches[match['next_match']]
+        next_match['entrants'][match['next_slot']] = winner
+        self.current_round = max(self.current_round, next_match['round'])
+        if all(next_match['entrants']):
+            self.start_match(next_match)
+
+    def finish_bracket(self, champion):
+        self.finished = True
+        self.champion = champion
+        socketio.emit('bracket_finished', {
+            'bracket_id': self.bracket_id,
+            'champion': self.entrants[champion]['name'],
+            'standings': self.get_standings()
+        }, room=f'bracket_{self.bracket_id}')
+
+    def get_standings(self):
+        def buchholz(entrant_id):
+            return sum(self.entrants[o]['points'] for o in self.entrants[entrant_id]['opponents'])
+
+        ranked = sorted(self.seeds, key=lambda e: (
+            self.entrants[e]['eliminated'],
+            -self.entrants[e]['points'],
+            -buchholz(e),
+            self.entrants[e]['seed']
+        ))
+        return [{
+            'entrant_id': e,
+            'name': self.entrants[e]['name'],
+            'seed': self.entrants[e]['seed'],
+            'points': self.entrants[e]['points'],
+            'eliminated': self.entrants[e]['eliminated']
+        } for e in ranked]
+
+    def get_match_info(self, match):
+        return {
+            'match_id': match['match_id'],
+            'round': match['round'],
+            'entrants': [self.entrants[e]['name'] if e else None for e in match['entrants']],
+            'room_id': match['room_id'],
+            'winner': self.entrants[match['winner']]['name'] if match['winner'] else None,
+            'status': match['status']
+        }
+
+    def get_bracket_info(self):
+        return {
+            'bracket_id': self.bracket_id,
+            'format': self.format,
+            'disk_count': self.disk_count,
+            'current_round': self.current_round,
+            'total_rounds': self.total_rounds,
+            'finished': self.finished,
+            'champion': self.entrants[self.champion]['name'] if self.champion else None,
+            'standings': self.get_standings(),
+            'matches': [self.get_match_info(m) for m in self.matches.values()]
+        }
+
+    def to_snapshot(self):
+        data = dict(vars(self))
+        data['created_at'] = self.created_at.isoformat()
+        data['round_pending'] = list(self.round_pending.items())
+        return data
+
+    @classmethod
+    def from_snapshot(cls, data, downtime):
+        bracket = cls.__new__(cls)
+        for name, value in data.items():
+            setattr(bracket, name, value)
+        bracket.created_at = datetime.fromisoformat(data['created_at'])
+        bracket.round_pending = dict(data['round_pending'])
+        for match in bracket.matches.values():
+            if match.get('started_at') is not None:
+                match['started_at'] += downtime  # Downtime doesn't count towards a no-show
+        return bracket
+
+def report_bracket_result(room, loser_id=None):
+    """Forward a finished match room's result to its bracket.
+
+    ``loser_id`` reports a walkover when a player leaves before the game ends.
+    """
+    if not room.bracket_match:
+        return
+    bracket_id, match_id = room.bracket_match
+    bracket = brackets.get(bracket_id)
+    if not bracket:
+        return
+
+    winner_id = room.winner
+    if loser_id:
+        winner_id = next((pid for pid in bracket.matches[match_id]['players'] if pid != loser_id), None)
+    if winner_id and bracket.report_result(match_id, winner_id):
+        room.bracket_match = None
+        # Advancing entrants get a new seat, so nobody is left to empty this room
+        socketio.start_background_task(close_match_room, room.room_id)
+
+def close_match_room(room_id):
+    socketio.sleep(MATCH_CLOSE_DELAY_SECONDS)
+    close_room(room_id, 'match_over')
+
+def get_max_players(game_mode, requested=None):
+    # Determine max players based on game mode
+    if game_mode == 'tournament':
+        return max(3, min(8, requested or 8))  # 3-8 players
+    elif game_mode == 'team':
+        return max(4, min(6, requested or 4))  # 4-6 players
+    elif game_mode == 'spectator':
+        return 2  # 2 players + unlimited spectators
+    else:  # classic
+        return 2
+
+def clamp_disk_count(value):
+    """Clamp a requested disk count into range; ``None`` if it isn't an integer."""
+    if not isinstance(value, int) or isinstance(value, bool):
+        return None
+    return max(MIN_DISKS, min(MAX_DISKS, value))
+
+def is_admin_request():
+    return bool(ADMIN_TOKEN) and secrets.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN)
+
+def close_room(room_id, reason='closed'):
+    """Tear down a room, notify anyone still connected and drop every session in it."""
+    room = game_rooms.pop(room_id, None)
+    if not room:
+        return False
+    
+    for player_id in list(room.players) + list(room.spectators):
+        player_sessions.pop(player_id, None)
+        disconnected_players.pop(player_id, None)
+        token = player_tokens.pop(player_id, None)
+        if token:
+            session_tokens.pop(token, None)
+    
+    socketio.emit('room_closed', {'room_id': room_id, 'reason': reason}, room=room_id)
+    socketio.close_room(room_id)
+    return True
+
+class HandlerProfiler:
+    """Time-boxed profiler attributing socket handler CPU time and emitted bytes to rooms.
+
+    While inactive, the only cost per handler call and emit is one attribute
+    check. While active, handler CPU time (``time.thread_time``) and the JSON
+    size of every emit are summed per ``(room_id, event)``, and a sampler
+    thread records the stack of each thread that is running a handler at
+    every interval. Samples are rooted at ``room:<id>;event:<name>`` so the
+    collapsed-stack output flamegraphs by room; idle threads are not walked.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.generation = 0  # Lets a stale sampler thread notice it was superseded
+        self.lock = threading.Lock()
+        self.context = {}  # thread ident -> (room_id, event) of the running handler
+        self.reset()
+
+    def reset(self):
+        self.handler_stats = {}  # (room_id, event) -> [calls, cpu_seconds]
+        self.emit_stats = {}     # (room_id, event) -> [messages sent, bytes sent]
+        self.stacks = {}         # collapsed stack -> sample count
+        self.samples = 0
+        self.started_at = None
+        self.ends_at = None
+        self.flamegraph_path = None
+
+    def start(self, duration, interval):
+        with self.lock:
+            if self.active:
+                return False
+            self.reset()
+            self.generation += 1
+            self.started_at = time.time()
+            self.ends_at = self.started_at + duration
+            self.active = True
+        # A real thread, so it can observe handler threads while they run
+        threading.Thread(target=self.sample, args=(interval, self.generation), daemon=True).start()
+        return True
+
+    def stop(self):
+        # The sampler thread notices, finishes its pass and writes the flamegraph
+        self.active = False
+
+    def sample(self, interval, generation):
+        while self.active and self.generation == generation and time.time() < self.ends_at:
+            # Only threads inside a handler; walking every thread's stack
+            # costs too much once there are thousands of idle socket threads
+            frames = sys._current_frames()
+            for ident, context in list(self.context.items()):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+                stack.append(f'event:{context[1]}')
+                stack.append(f'room:{context[0]}')
+                key = ';'.join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+            time.sleep(interval)
+        
+        with self.lock:
+            if self.generation == generation:
+                self.active = False
+                self.flamegraph_path = self.write_flamegraph()
+
+    def run_handler(self, event, handler, args):
+        if not self.active:
+            return handler(*args)
+        
+        data = args[0] if args else None
+        room_id = data.get('room_id') if isinstance(data, dict) else None
+        if room_id is None:
+            room_id = player_sessions.get(socket_sessions.get(request.sid))
+        
+        ident = threading.get_ident()
+        self.context[ident] = (room_id, event)
+        start = time.thread_time()
+        try:
+            return handler(*args)
+        finally:
+            elapsed = time.thread_time() - start
+            self.context.pop(ident, None)
+            stats = self.handler_stats.setdefault((room_id, event), [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+
+    def record_emit(self, event, args, kwargs):
+        room_id = kwargs.get('room') or kwargs.get('to')
+        # Count what actually goes on the wire: one copy per recipient, the same
+        # way the per-socket opponent_move sends are counted
+        skip = kwargs.get('skip_sid')
+        skip = skip if isinstance(skip, list) else [skip]
+        recipients = sum(1 for sid, _ in socketio.server.manager.get_participants(
+            kwargs.get('namespace') or '/', room_id) if sid not in skip)
+        if room_id not in game_rooms:
+            # Sent to a single socket: charge it to the handler's room, or
+            # outside a handler to the room that socket's player is in
+            room_id = (self.context.get(threading.get_ident(), (None, None))[0]
+                       or player_sessions.get(socket_sessions.get(room_id)))
+        try:
+            size = len(json.dumps(args[0] if args else None, default=str))
+        except (TypeError, ValueError):
+            size = 0
+        stats = self.emit_stats.setdefault((room_id, event), [0, 0])
+        stats[0] += recipients
+        stats[1] += size * recipients
+
+    def write_flamegraph(self):
+        if not self.stacks:
+            return None
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded")
+            with open(path, 'w') as f:
+                for stack, count in sorted(self.stacks.items()):
+                    f.write(f'{stack} {count}\n')
+            return path
+        except OSError as e:
+            print(f'Could not write flamegraph: {e}')
+            return None
+
+    def get_report(self, top=PROFILE_TOP_N):
+        handler_stats = list(self.handler_stats.items())
+        handlers = sorted(handler_stats, key=lambda item: -item[1][1])[:top]
+        emits = sorted(list(self.emit_stats.items()), key=lambda item: -item[1][1])[:top]
+        rooms = {}
+        for (room_id, _), (_, cpu) in handler_stats:
+            rooms[room_id] = rooms.get(room_id, 0.0) + cpu
+        return {
+            'active': self.active,
+            'started_at': self.started_at,
+            'remaining_seconds': max(0.0, round(self.ends_at - time.time(), 3)) if self.active else 0.0,
+            'samples': self.samples,
+            'top_handlers': [{
+                'room_id': room_id, 'event': event, 'calls': calls, 'cpu_ms': round(cpu * 1000, 3)
+            } for (room_id, event), (calls, cpu) in handlers],
+            'top_emits': [{
+                'room_id': room_id, 'event': event, 'emits': count, 'bytes': size
+            } for (room_id, event), (count, size) in emits],
+            'top_rooms': [{
+                'room_id': room_id, 'cpu_ms': round(cpu * 1000, 3)
+            } for room_id, cpu in sorted(rooms.items(), key=lambda item: -item[1])[:top]],
+            'flamegraph': self.flamegraph_path
+        }
+
+profiler = HandlerProfiler()
+
+def profiled(handler):
+    """Route a socket handler through the profiler; apply under ``@socketio.on``."""
+    event = handler.__name__[len('handle_'):]
+    arg_count = len(inspect.signature(handler).parameters)
+    
+    @functools.wraps(handler)
+    def wrapper(*args):
+        # Flask-SocketIO probes optional arguments, so only pass what the handler takes
+        return profiler.run_handler(event, handler, args[:arg_count])
+    return wrapper
+
+# Every emit, including flask_socketio.emit() replies, goes through socketio.emit
+socketio_emit = socketio.emit
+
+def emit_with_profiling(event, *args, **kwargs):
+    if profiler.active:
+        profiler.record_emit(event, args, kwargs)
+    return socketio_emit(event, *args, **kwargs)
+
+socketio.emit = emit_with_profiling
+
+class OutboundQueues:
+    """Per-connection send queues for the high-frequency ``opponent_move`` broadcasts.
+
+    Updates for the same mover are coalesced, since only the latest count
+    matters, and held back while the connection's transport queue is over
+    ``OUTBOUND_QUEUE_LIMIT``. A connection that stays over the limit for
+    ``SLOW_CONSUMER_SECONDS`` is downgraded to periodic ``room_snapshot``
+    messages. If it is still over the limit ``EVICT_SECONDS`` later, it is
+    disconnected and can come back through ``resume_session``.
+    """
+
+    def __init__(self):
+        self.connections = {}  # sid -> per-connection queue state
+        self.lock = threading.Lock()
+        self.flusher_started = False
+        self.coalesced = 0
+        self.snapshots_sent = 0
+        self.downgraded = 0
+        self.evicted = 0
+
+    def transport_depth(self, eio_sid):
+        eio_socket = socketio.server.eio.sockets.get(eio_sid)
+        try:
+            return eio_socket.queue.qsize() if eio_socket else 0
+        except (AttributeError, NotImplementedError):
+            return 0
+
+    def broadcast_move(self, room_id, payload):
+        key = payload['player_id']
+        with self.lock:
+            for sid, eio_sid in socketio.server.manager.get_participants('/', room_id):
+                conn = self.connections.get(sid)
+                if conn is None:
+                    conn = self.connections[sid] = {
+                        'eio_sid': eio_sid,
+                        'room_id': room_id,
+                        'pending': {},  # mover player_id -> latest opponent_move payload
+                        'over_limit_since': None,
+                        'snapshot_mode': False,
+                        'snapshot_due': False,
+                        'last_snapshot': 0.0
+                    }
+                conn['room_id'] = room_id
+                
+                if conn['snapshot_mode']:
+                    conn['snapshot_due'] = True
+                    continue
+                if key in conn['pending']:
+                    self.coalesced += 1
+                conn['pending'][key] = payload
+                self.flush(sid, conn, time.time())
+        self.ensure_flusher()
+
+    def flush(self, sid, conn, now):
+        depth = self.transport_depth(conn['eio_sid'])
+        if depth >= OUTBOUND_QUEUE_LIMIT:
+            if conn['over_limit_since'] is None:
+                conn['over_limit_since'] = now
+            return
+        
+        conn['over_limit_since'] = None
+        pending = conn['pending']
+        conn['pending'] = {}
+        for payload in pending.values():
+            socketio.emit('opponent_move', payload, to=sid)
+
+    def send_snapshot(self, sid, conn, now):
+        room = game_rooms.get(conn['room_id'])
+        if room:
+            socketio.emit('room_snapshot', {
+                'room_id': room.room_id,
+                'seq': room.move_seq,
+                'players': {
+                    pid: {
+                        'player_name': pinfo['name'],
+                        'moves': pinfo['game_state']['moves'] if pinfo.get('game_state') else 0,
+                        'stats': room.get_player_stats(pid)
+                    } for pid, pinfo in room.players.items()
+                }
+            }, to=sid)
+            self.snapshots_sent += 1
+        conn['snapshot_due'] = False
+        conn['last_snapshot'] = now
+
+    def service(self):
+        # Background pass: retry held updates, downgrade or evict slow consumers
+        now = time.time()
+        evict = []
+        with self.lock:
+            for sid, conn in list(self.connections.items()):
+                depth = self.transport_depth(conn['eio_sid'])
+                if depth >= OUTBOUND_QUEUE_LIMIT:
+                    if conn['over_limit_since'] is None:
+                        conn['over_limit_since'] = now
+                    over_for = now - conn['over_limit_since']
+                    if over_for >= SLOW_CONSUMER_SECONDS + EVICT_SECONDS:
+                        evict.append(sid)
+                    elif over_for >= SLOW_CONSUMER_SECONDS and not conn['snapshot_mode']:
+                        conn['snapshot_mode'] = True
+                        conn['snapshot_due'] = True
+                        self.coalesced += len(conn['pending'])
+                        conn['pending'] = {}
+                        self.downgraded += 1
+                    continue
+                
+                conn['over_limit_since'] = None
+                if conn['snapshot_mode']:
+                    if conn['snapshot_due'] and now - conn['last_snapshot'] >= SNAPSHOT_INTERVAL_SECONDS:
+                        self.send_snapshot(sid, conn, now)
+                    elif depth == 0 and not conn['snapshot_due']:
+                        # Caught up with the latest snapshot: back to live updates
+                        conn['snapshot_mode'] = False
+                elif conn['pending']:
+                    self.flush(sid, conn, now)
+                elif conn['room_id'] not in game_rooms:
+                    del self.connections[sid]
+        
+        for sid in evict:
+            self.evicted += 1
+            self.forget(sid)
+            socketio.server.disconnect(sid)
+
+    def run_flusher(self):
+        while True:
+            socketio.sleep(OUTBOUND_FLUSH_INTERVAL)
+            self.service()
+
+    def ensure_flusher(self):
+        with self.lock:
+            if self.flusher_started:
+                return
+            self.flusher_started = True
+        socketio.start_background_task(self.run_flusher)
+
+    def forget(self, sid):
+        with self.lock:
+            self.connections.pop(sid, None)
+
+    def get_metrics(self):
+        # Distribution of transport queue depths across every connection on this worker
+        buckets = [(0, '0'), (4, '1-4'), (16, '5-16'), (64, '17-64'), (256, '65-256')]
+        histogram = {label: 0 for _, label in buckets}
+        histogram['257+'] = 0
+        depths = [self.transport_depth(eio_sid) for eio_sid in list(socketio.server.eio.sockets)]
+        for depth in depths:
+            label = next((label for limit, label in buckets if depth <= limit), '257+')
+            histogram[label] += 1
+        
+        with self.lock:
+            tracked = list(self.connections.values())
+        return {
+            'connections': len(depths),
+            'max_depth': max(depths, default=0),
+            'depth_histogram': histogram,
+            'queue_limit': OUTBOUND_QUEUE_LIMIT,
+            'held_updates': sum(len(conn['pending']) for conn in tracked),
+            'snapshot_mode_connections': sum(1 for conn in tracked if conn['snapshot_mode']),
+            'coalesced_updates': self.coalesced,
+            'snapshots_sent': self.snapshots_sent,
+            'downgraded': self.downgraded,
+            'evicted': self.evicted
+        }
+
+outbound_queues = OutboundQueues()
+
+class StaticBundle:
+    """Pages and static assets prepared once at startup and served from memory.
+
+    Each entry keeps the raw body and a gzip-precompressed variant, each with
+    its own ETag, so requests cost a dict lookup instead of a template render
+    or file read.
+    """
+
+    def __init__(self):
+        self.assets = {}
+
+    def add(self, key, body, content_type, cache_control):
+        # Imported here so workers running without the bundle never load them
+        import gzip
+        import hashlib
+        
+        digest = hashlib.sha1(body).hexdigest()
+        self.assets[key] = {
+            'body': body,
+            'gzip_body': gzip.compress(body, 9),
+            'etag': f'"{digest[:16]}"',
+            'gzip_etag': f'"{digest[:16]}-gz"',  # Each encoding is its own representation
+            'version': digest[:10],
+            'content_type': content_type,
+            'cache_control': cache_control
+        }
+
+    def get(self, key):
+        return self.assets.get(key)
+
+    def respond(self, key):
+        asset = self.assets[key]
+        # Honour q-values, so "gzip;q=0" gets the identity body
+        use_gzip = request.accept_encodings['gzip'] > 0
+        etag = asset['gzip_etag'] if use_gzip else asset['etag']
+        cache_control = asset['cache_control']
+        if request.args.get('v') != asset['version']:
+            # Only the current versioned URL is safe to pin; anything else revalidates by ETag
+            cache_control = 'no-cache'
+        headers = {
+            'ETag': etag,
+            'Cache-Control': cache_control,
+            'Vary': 'Accept-Encoding'
+        }
+        
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=304, headers=headers)
+        
+        body = asset['body']
+        if use_gzip:
+            body = asset['gzip_body']
+            headers['Content-Encoding'] = 'gzip'
+        return Response(body, content_type=asset['content_type'], headers=headers)
+
+static_bundle = StaticBundle()
+
+def build_static_bundle():
+    import mimetypes
+    
+    # Static assets first, so the pages render with versioned asset URLs
+    for filename in sorted(os.listdir(app.static_folder)):
+        path = os.path.join(app.static_folder, filename)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                body = f.read()
+            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type.endswith('javascript'):
+                content_type += '; charset=utf-8'
+            static_bundle.add(f'static/{filename}', body, content_type,
+                              f'public, max-age={STATIC_MAX_AGE}, immutable')
+    
+    # The pages take no per-request context, so a single render serves every request
+    with app.test_request_context('/'):
+        for template in ('index.html', 'multiplayer.html'):
+            body = render_template(template).encode('utf-8')
+            static_bundle.add(f'page/{template}', body, 'text/html; charset=utf-8', 'no-cache')
+    
+    app.view_functions['static'] = bundled_static
+
+@app.url_defaults
+def add_static_version(endpoint, values):
+    # Content version in the URL lets browsers cache assets for a year
+    if endpoint == 'static' and STATIC_BUNDLE:
+        asset = static_bundle.get(f"static/{values.get('filename')}")
+        if asset:
+            values['v'] = asset['version']
+
+def bundled_static(filename):
+    if static_bundle.get(f'static/{filename}'):
+        return static_bundle.respond(f'static/{filename}')
+    return app.send_static_file(filename)
+
+@app.route('/admin/startup-profile')
+def get_startup_profile():
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    return jsonify({
+        'success': True,
+        'phases': startup_profile,
+        'total': round(sum(startup_profile.values()), 6),
+        'static_bundle': STATIC_BUNDLE,
+        'bundled_assets': sorted(static_bundle.assets)
+    })
+
+@app.route('/admin/profiling', methods=['GET', 'POST'])
+def admin_profiling():
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    
+    if request.method == 'POST':
+        data = request.get_json() or {}
+        if data.get('enabled', True):
+            duration = max(0.1, min(float(data.get('duration_seconds', 5)), PROFILE_MAX_SECONDS))
+            interval = max(0.001, float(data.get('sample_interval_ms', 10)) / 1000)
+            if not profiler.start(duration, interval):
+                return jsonify({'success': False, 'error': 'Profiling already running'}), 409
+        else:
+            profiler.stop()
+    
+    return jsonify(dict(profiler.get_report(), success=True))
+
+@app.route('/admin/outbound-metrics')
+def admin_outbound_metrics():
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    return jsonify(dict(outbound_queues.get_metrics(), success=True))
+
+@app.route('/admin/profiling/flamegraph')
+def admin_flamegraph():
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    if not profiler.flamegraph_path:
+        return jsonify({'success': False, 'error': 'No flamegraph recorded yet'}), 404
+    
+    with open(profiler.flamegraph_path) as f:
+        return Response(f.read(), mimetype='text/plain')
+
 @app.route('/')
 def index():
+    if STATIC_BUNDLE:
+        return static_bundle.respond('page/index.html')
     return render_template('index.html')
 
 @app.route('/multiplayer')
 def multiplayer():
+    if STATIC_BUNDLE:
+        return static_bundle.respond('page/multiplayer.html')
     return render_template('multiplayer.html')
 
 @app.route('/create-room', methods=['POST'])
 def create_room():
     data = request.get_json()
     player_name = data.get('player_name', 'Anonymous')
-    disk_count = data.get('disk_count', 4)
+    disk_count = clamp_disk_count(data.get('disk_count', 4))
+    if disk_count is None:
+        return jsonify({'success': False, 'error': 'disk_count must be an integer'}), 400
     game_mode = data.get('game_mode', 'classic')  # classic, tournament, team, spectator
+    max_players = get_max_players(game_mode, data.get('max_players'))
     
-    # Determine max players based on game mode
-    if game_mode == 'tournament':
-        max_players = data.get('max_players', 8)  # 3-8 players
-        max_players = max(3, min(8, max_players))
-    elif game_mode == 'team':
-        max_players = data.get('max_players', 4)  # 4-6 players
-        max_players = max(4, min(6, max_players))
-    elif game_mode == 'spectator':
-        max_players = 2  # 2 players + unlimited spectators
-    else:  # classic
-        max_players = 2
-    
-    room_id = str(uuid.uuid4())[:8]  # Short room ID
+    room_id = room_id_allocator.allocate(game_rooms)  # Short room ID
     player_id = str(uuid.uuid4())
     
     # Create new room
@@ -374,62 +1777,488 @@ def join_room_api():
     
     return jsonify({'success': False, 'error': 'Failed to join room'})
 
+@app.route('/admin/rooms/batch-create', methods=['POST'])
+def batch_create_rooms():
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Expected a JSON object'}), 400
+    
+    specs = data.get('rooms')
+    if specs is None:
+        # Shorthand: N identical rooms from the top-level settings
+        count = data.get('count', 0)
+        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+            return jsonify({'success': False, 'error': 'count must be a non-negative integer'}), 400
+        if count > BULK_MAX_ROOMS:
+            return jsonify({'success': False, 'error': f'At most {BULK_MAX_ROOMS} rooms per batch'}), 400
+        specs = [data] * count
+    elif not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+        return jsonify({'success': False, 'error': 'rooms must be a list of objects'}), 400
+    
+    # Checked up front so a bad entry can't leave half a batch created
+    for spec in specs:
+        requested = spec.get('max_players')
+        if requested is not None and (not isinstance(requested, int) or isinstance(requested, bool)):
+            return jsonify({'success': False, 'error': 'max_players must be an integer'}), 400
+        if clamp_disk_count(spec.get('disk_count', 4)) is None:
+            return jsonify({'success': False, 'error': 'disk_count must be an integer'}), 400
+    
+    if len(specs) > BULK_MAX_ROOMS:
+        return jsonify({'success': False, 'error': f'At most {BULK_MAX_ROOMS} rooms per batch'}), 400
+    
+    # One random read for all player IDs instead of a uuid4() call per room
+    random_bytes = os.urandom(16 * len(specs))
+    created = []
+    
+    for i, spec in enumerate(specs):
+        room_id = room_id_allocator.allocate(game_rooms)
+        player_id = str(uuid.UUID(bytes=random_bytes[i * 16:(i + 1) * 16], version=4))
+        
+        game_mode = spec.get('game_mode', 'classic')
+        max_players = get_max_players(game_mode, spec.get('max_players'))
+        room = GameRoom(room_id, player_id, spec.get('player_name', 'Host'), game_mode, max_players)
+        room.disk_count = clamp_disk_count(spec.get('disk_count', 4))
+        game_rooms[room_id] = room
+        player_sessions[player_id] = room_id
+        
+        created.append({
+            'room_id': room_id,
+            'player_id': player_id,
+            'game_mode': game_mode,
+            'max_players': max_players,
+            'invite_link': f'/room/{room_id}'
+        })
+    
+    return jsonify({'success': True, 'rooms': created})
+
+@app.route('/admin/rooms/batch-close', methods=['POST'])
+def batch_close_rooms():
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Expected a JSON object'}), 400
+    
+    room_ids = data.get('room_ids') or []
+    if not isinstance(room_ids, list) or not all(isinstance(room_id, str) for room_id in room_ids):
+        return jsonify({'success': False, 'error': 'room_ids must be a list of room IDs'}), 400
+    room_ids = set(room_ids)
+    
+    # Expire rooms by age and/or state in the same call
+    older_than = data.get('older_than_seconds')
+    finished_only = data.get('finished_only', False)
+    if older_than is not None and (not isinstance(older_than, (int, float)) or isinstance(older_than, bool) or older_than < 0):
+        return jsonify({'success': False, 'error': 'older_than_seconds must be a non-negative number'}), 400
+    if not isinstance(finished_only, bool):
+        return jsonify({'success': False, 'error': 'finished_only must be true or false'}), 400
+    if older_than is not None or finished_only:
+        now = datetime.now()
+        for room_id, room in list(game_rooms.items()):
+            if older_than is not None and (now - room.created_at).total_seconds() < older_than:
+                continue
+            if finished_only and not room.game_finished:
+                continue
+            room_ids.add(room_id)
+    
+    closed = [room_id for room_id in room_ids if close_room(room_id, data.get('reason', 'closed'))]
+    return jsonify({'success': True, 'closed': closed, 'closed_count': len(closed)})
+
+@app.route('/admin/rooms/export')
+def export_rooms():
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    
+    requested = request.args.get('room_ids')
+    room_ids = requested.split(',') if requested else list(game_rooms)
+    
+    def generate():
+        # One JSON document per line, streamed so large exports don't build one big body
+        for room_id in room_ids:
+            room = game_rooms.get(room_id)
+            if room:
+                room_info = room.get_room_info()
+                room_info['created_at'] = room.created_at.isoformat()
+                yield json.dumps(room_info) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/admin/brackets', methods=['POST'])
+def create_bracket():
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Expected a JSON object'}), 400
+    
+    entrant_names = data.get('entrants', [])
+    bracket_format = data.get('format', 'single_elimination')
+    rounds = data.get('rounds')
+    
+    if bracket_format not in ('single_elimination', 'swiss'):
+        return jsonify({'success': False, 'error': 'Unknown bracket format'}), 400
+    if not isinstance(entrant_names, list) or not all(isinstance(name, str) for name in entrant_names):
+        return jsonify({'success': False, 'error': 'entrants must be a list of names'}), 400
+    if len(entrant_names) < 2:
+        return jsonify({'success': False, 'error': 'A bracket needs at least 2 entrants'}), 400
+    if len(entrant_names) > BULK_MAX_ROOMS:
+        return jsonify({'success': False, 'error': f'At most {BULK_MAX_ROOMS} entrants per bracket'}), 400
+    if rounds is not None and (not isinstance(rounds, int) or isinstance(rounds, bool)
+                               or not 1 <= rounds <= MAX_SWISS_ROUNDS):
+        return jsonify({'success': False, 'error': f'rounds must be an integer from 1 to {MAX_SWISS_ROUNDS}'}), 400
+    disk_count = clamp_disk_count(data.get('disk_count', 4))
+    if disk_count is None:
+        return jsonify({'success': False, 'error': 'disk_count must be an integer'}), 400
+    
+    bracket_id = room_id_allocator.allocate(brackets)
+    bracket = TournamentBracket(bracket_id, entrant_names, bracket_format,
+                                disk_count, rounds)
+    brackets[bracket_id] = bracket
+    bracket.start()
+    ensure_no_show_sweeper()
+    
+    return jsonify({
+        'success': True,
+        'bracket_id': bracket_id,
+        'format': bracket_format,
+        'total_rounds': bracket.total_rounds,
+        'entrants': [{
+            'entrant_id': e,
+            'name': bracket.entrants[e]['name'],
+            'join_link': f'/bracket/{bracket_id}?entrant={e}'
+        } for e in bracket.seeds]
+    })
+
+@app.route('/bracket/<bracket_id>')
+def bracket_page(bracket_id):
+    # The multiplayer page joins the bracket and takes each assigned seat itself
+    if bracket_id not in brackets:
+        return redirect(url_for('index'))
+    if STATIC_BUNDLE:
+        return static_bundle.respond('page/multiplayer.html')
+    return render_template('multiplayer.html')
+
+@app.route('/brackets/<bracket_id>')
+def get_bracket(bracket_id):
+    if bracket_id not in brackets:
+        return jsonify({'success': False, 'error': 'Bracket not found'}), 404
+    return jsonify(dict(brackets[bracket_id].get_bracket_info(), success=True))
+
 @app.route('/room/<room_id>')
 def room_page(room_id):
     if room_id not in game_rooms:
         return redirect(url_for('index'))
+    if STATIC_BUNDLE:
+        return static_bundle.respond('page/multiplayer.html')
     return render_template('multiplayer.html', room_id=room_id)
 
+@app.route('/hint', methods=['POST'])
+def hint_api():
+    data = request.get_json()
+    hint, error = get_hint(data.get('room_id'), data.get('pegs'))
+    if error:
+        return jsonify({'success': False, 'error': error})
+    return jsonify(dict(hint, success=True))
+
+@app.route('/hint-stats')
+def hint_stats():
+    return jsonify(hint_cache.get_stats())
+
 @socketio.on('connect')
+@profiled
 def handle_connect():
     print(f'Client connected: {request.sid}')
 
+def remove_player_from_room(room_id, player_id):
+    """Forfeit an active game for the player, drop them from the room and clean up their session."""
+    if room_id in game_rooms:
+        room = game_rooms[room_id]
+        player_name = room.players.get(player_id, room.spectators.get(player_id, {})).get('name', 'Unknown Player')
+        
+        # If game is active, this counts as a forfeit
+        if room.game_started and not room.game_finished and player_id in room.players:
+            if room.forfeit_game(player_id):
+                winner_info = {
+                    'player_id': room.winner,
+                    'player_name': room.players[room.winner]['name']
+                }
+                socketio.emit('game_ended', {
+                    'winner': winner_info,
+                    'forfeit': True,
+                    'left_game': True,
+                    'room_info': room.get_room_info(),
+                    'stats': room.get_all_stats()
+                }, room=room_id)
+                report_bracket_result(room)
+        
+        # Leaving a bracket match before it is decided hands the opponent a walkover
+        if player_id in room.players:
+            report_bracket_result(room, loser_id=player_id)
+        
+        if room.remove_player(player_id):
+            # Room is empty, delete it
+            del game_rooms[room_id]
+        else:
+            # Notify other players about player leaving
+            socketio.emit('player_left', {
+                'player_name': player_name,
+                'room_info': room.get_room_info()
+            }, room=room_id)
+    
+    # Clean up sessions
+    if player_id in player_sessions:
+        del player_sessions[player_id]
+    token = player_tokens.pop(player_id, None)
+    if token:
+        session_tokens.pop(token, None)
+    disconnected_players.pop(player_id, None)
+
+def expire_disconnected_players():
+    # Background sweep: players whose grace period ran out are treated as having left
+    while True:
+        socketio.sleep(1)
+        now = time.time()
+        expired = [pid for pid, disconnected_at in list(disconnected_players.items())
+                   if now - disconnected_at >= RECONNECT_GRACE_SECONDS]
+        for player_id in expired:
+            if player_id in disconnected_players:
+                remove_player_from_room(player_sessions.get(player_id), player_id)
+
+reconnect_sweeper_lock = threading.Lock()
+reconnect_sweeper_started = False
+
+def ensure_reconnect_sweeper():
+    global reconnect_sweeper_started
+    with reconnect_sweeper_lock:
+        if not reconnect_sweeper_started:
+            reconnect_sweeper_started = True
+            socketio.start_background_task(expire_disconnected_players)
+
+def forfeit_no_show_matches():
+    # Background sweep: bracket matches nobody started in time are decided by walkover
+    while True:
+        socketio.sleep(1)
+        live = [bracket for bracket in list(brackets.values()) if not bracket.finished]
+        if not live:
+            continue
+        now = time.time()
+        present = set(socket_sessions.values()) | set(disconnected_players)
+        for bracket in live:
+            for room_id in bracket.expire_no_shows(now, present):
+                close_room(room_id, 'walkover')
+
+no_show_sweeper_lock = threading.Lock()
+no_show_sweeper_started = False
+
+def ensure_no_show_sweeper():
+    global no_show_sweeper_started
+    if MATCH_NO_SHOW_SECONDS <= 0:
+        return
+    with no_show_sweeper_lock:
+        if not no_show_sweeper_started:
+            no_show_sweeper_started = True
+            socketio.start_background_task(forfeit_no_show_matches)
+
+class StateSnapshotter:
+    """Saves and restores every live room so a deploy doesn't end running matches.
+
+    The file is ``SNAPSHOT_MAGIC``, a format version byte, then gzip-compressed
+    JSON. Background snapshots fork where the OS allows it: the child process
+    serializes its copy-on-write view of memory while the parent keeps serving.
+    Elsewhere a thread serializes the rooms one at a time instead.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.in_progress = False
+        self.last_result = None
+
+    def collect(self):
+        return {
+            'saved_at': time.time(),
+            'rooms': [room.to_snapshot() for room in list(game_rooms.values())],
+            'brackets': [bracket.to_snapshot() for bracket in list(brackets.values())],
+            'player_sessions': dict(player_sessions),
+            'player_tokens': dict(player_tokens),
+            # Seats with a live or held socket; only these can come back through resume_session
+            'connected_players': list(set(socket_sessions.values()) | set(disconnected_players))
+        }
+
+    def write(self):
+        import gzip
+        
+        state = self.collect()
+        body = gzip.compress(json.dumps(state, separators=(',', ':')).encode('utf-8'), 6)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]))
+            f.write(body)
+        os.replace(tmp_path, self.path)
+        return len(state['rooms'])
+
+    def start_background(self):
+        with self.lock:
+            if self.in_progress:
+                return False
+            self.in_progress = True
+        
+        started = time.time()
+        if SNAPSHOT_FORK and hasattr(os, 'fork'):
+            import gzip  # Import before forking; the child must not wait on the import lock
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    self.write()
+                    os._exit(0)
+                except BaseException:
+                    os._exit(1)
+            threading.Thread(target=self.wait_for_child, args=(pid, started), daemon=True).start()
+        else:
+            threading.Thread(target=self.write_in_thread, args=(started,), daemon=True).start()
+        return True
+
+    def wait_for_child(self, pid, started):
+        _, status = os.waitpid(pid, 0)
+        self.finish(started, os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0, 'fork')
+
+    def write_in_thread(self, started):
+        try:
+            self.write()
+            self.finish(started, True, 'thread')
+        except Exception as e:
+            print(f'State snapshot failed: {e}')
+            self.finish(started, False, 'thread')
+
+    def finish(self, started, success, method):
+        self.last_result = {
+            'success': success,
+            'method': method,
+            'path': self.path,
+            'started_at': started,
+            'duration_seconds': round(time.time() - started, 3)
+        }
+        self.in_progress = False
+
+    def restore(self):
+        """Load the snapshot file into empty server state; returns the number of rooms restored."""
+        import gzip
+        import zlib
+        
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(len(SNAPSHOT_MAGIC) + 1)
+                body = f.read()
+        except FileNotFoundError:
+            return 0
+        
+        if header[:-1] != SNAPSHOT_MAGIC or header[-1:] != bytes([SNAPSHOT_VERSION]):
+            self.set_aside('unknown format')
+            return 0
+        
+        # Rebuild everything locally first so a bad file can't leave half a state behind
+        try:
+            state = json.loads(gzip.decompress(body))
+            downtime = max(time.time() - state['saved_at'], 0)
+            rooms = {}
+            for data in state['rooms']:
+                room = GameRoom.from_snapshot(data, downtime)
+                rooms[room.room_id] = room
+            restored_brackets = {}
+            for data in state['brackets']:
+                bracket = TournamentBracket.from_snapshot(data, downtime)
+                restored_brackets[bracket.bracket_id] = bracket
+            sessions = dict(state['player_sessions'])
+            tokens = dict(state['player_tokens'])
+            connected = list(state['connected_players'])
+        except (OSError, EOFError, zlib.error, ValueError, KeyError, TypeError, AttributeError) as e:
+            self.set_aside(f'{type(e).__name__}: {e}')
+            return 0
+        
+        game_rooms.update(rooms)
+        brackets.update(restored_brackets)
+        player_sessions.update(sessions)
+        player_tokens.update(tokens)
+        session_tokens.update({token: pid for pid, token in tokens.items()})
+        
+        # Sockets died with the old process: hold their seats for the reconnect window.
+        # Seats nobody had joined yet (batch rooms, unplayed bracket matches) stay as they were.
+        now = time.time()
+        held = [pid for pid in connected if pid in player_sessions]
+        for player_id in held:
+            disconnected_players[player_id] = now
+        if held:
+            ensure_reconnect_sweeper()
+        if restored_brackets:
+            ensure_no_show_sweeper()
+            # Rooms of matches decided just before the snapshot still need closing
+            for bracket in restored_brackets.values():
+                for match in bracket.matches.values():
+                    if match['status'] == 'finished' and match['room_id'] in game_rooms:
+                        socketio.start_background_task(close_match_room, match['room_id'])
+        
+        return len(rooms)
+
+    def set_aside(self, reason):
+        # Keep the unreadable file for inspection, but out of the way of the next boot
+        bad_path = f"{self.path}.bad-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        print(f'Could not restore state snapshot {self.path} ({reason}); moved it to {bad_path}')
+        try:
+            os.replace(self.path, bad_path)
+        except OSError as e:
+            print(f'Could not move bad snapshot aside: {e}')
+
+state_snapshotter = StateSnapshotter(SNAPSHOT_PATH)
+
+def run_periodic_snapshots():
+    while True:
+        socketio.sleep(STATE_SNAPSHOT_INTERVAL)
+        state_snapshotter.start_background()
+
+@app.route('/admin/snapshot', methods=['GET', 'POST'])
+def admin_snapshot():
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    
+    if request.method == 'POST' and not state_snapshotter.start_background():
+        return jsonify({'success': False, 'error': 'Snapshot already running'}), 409
+    
+    return jsonify({
+        'success': True,
+        'in_progress': state_snapshotter.in_progress,
+        'last_result': state_snapshotter.last_result
+    })
+
 @socketio.on('disconnect')
+@profiled
 def handle_disconnect():
     print(f'Client disconnected: {request.sid}')
+    outbound_queues.forget(request.sid)
     
     # Find player ID from socket session
-    player_id = socket_sessions.get(request.sid)
+    player_id = socket_sessions.pop(request.sid, None)
     if player_id and player_id in player_sessions:
         room_id = player_sessions[player_id]
         
-        if room_id in game_rooms:
+        if room_id in game_rooms and RECONNECT_GRACE_SECONDS > 0:
+            # Hold the seat so a transient drop doesn't forfeit the match
             room = game_rooms[room_id]
-            player_name = room.players.get(player_id, {}).get('name', 'Unknown Player')
-            
-            # If game is active, this counts as a forfeit
-            if room.game_started and not room.game_finished and player_id in room.players:
-                if room.forfeit_game(player_id):
-                    winner_info = {
-                        'player_id': room.winner,
-                        'player_name': room.players[room.winner]['name']
-                    }
-                    socketio.emit('game_ended', {
-                        'winner': winner_info,
-                        'forfeit': True,
-                        'left_game': True,
-                        'room_info': room.get_room_info()
-                    }, room=room_id)
-            
-            if room.remove_player(player_id):
-                # Room is empty, delete it
-                del game_rooms[room_id]
-            else:
-                # Notify other players about player leaving
-                socketio.emit('player_left', {
-                    'player_name': player_name,
-                    'room_info': room.get_room_info()
-                }, room=room_id)
-        
-        # Clean up sessions
-        if player_id in player_sessions:
-            del player_sessions[player_id]
-    
-    # Clean up socket session
-    if request.sid in socket_sessions:
-        del socket_sessions[request.sid]
+            disconnected_players[player_id] = time.time()
+            ensure_reconnect_sweeper()
+            socketio.emit('player_disconnected', {
+                'player_id': player_id,
+                'player_name': room.players.get(player_id, room.spectators.get(player_id, {})).get('name', 'Unknown Player'),
+                'grace_seconds': RECONNECT_GRACE_SECONDS
+            }, room=room_id)
+        else:
+            remove_player_from_room(room_id, player_id)
 
 @socketio.on('join_game_room')
+@profiled
 def handle_join_game_room(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -437,11 +2266,92 @@ def handle_join_game_room(data):
     if room_id in game_rooms and player_id in game_rooms[room_id].players:
         join_room(room_id)
         socket_sessions[request.sid] = player_id  # Track socket to player mapping
-        emit('room_joined', game_rooms[room_id].get_room_info())
+        # Rejoining from a fresh page load also cancels a pending grace expiry
+        reconnected = disconnected_players.pop(player_id, None) is not None
+        
+        # Reconnect token lets a new socket take over this seat after a drop
+        if player_id not in player_tokens:
+            token = secrets.token_urlsafe(16)
+            player_tokens[player_id] = token
+            session_tokens[token] = player_id
+        
+        room_info = game_rooms[room_id].get_room_info()
+        emit('room_joined', dict(room_info, reconnect_token=player_tokens[player_id]))
+        if reconnected:
+            socketio.emit('player_reconnected', {
+                'player_id': player_id,
+                'player_name': game_rooms[room_id].players[player_id]['name']
+            }, room=room_id)
         # Notify all players in room about current state
-        socketio.emit('room_update', game_rooms[room_id].get_room_info(), room=room_id)
+        socketio.emit('room_update', room_info, room=room_id)
+
+@socketio.on('resume_session')
+@profiled
+def handle_resume_session(data):
+    token = data.get('reconnect_token')
+    last_seq = data.get('last_seq', 0)
+    player_id = session_tokens.get(token)
+    room_id = player_sessions.get(player_id)
+    
+    if not player_id or room_id not in game_rooms:
+        emit('resume_failed', {'error': 'Session expired'})
+        return
+    
+    room = game_rooms[room_id]
+    
+    # Re-bind the seat to this socket, dropping any stale socket mapping
+    for sid, pid in list(socket_sessions.items()):
+        if pid == player_id:
+            del socket_sessions[sid]
+    socket_sessions[request.sid] = player_id
+    disconnected_players.pop(player_id, None)
+    join_room(room_id)
+    
+    if not isinstance(last_seq, int) or last_seq < 0:
+        last_seq = 0
+    
+    player = room.players.get(player_id)
+    emit('session_resumed', {
+        'room_id': room_id,
+        'player_id': player_id,
+        'game_state': player['game_state'] if player else None,
+        'catch_up': room.get_moves_since(last_seq),
+        'room_info': room.get_room_info()
+    })
+    socketio.emit('player_reconnected', {
+        'player_id': player_id,
+        'player_name': player['name'] if player else room.spectators.get(player_id, {}).get('name', 'Unknown Player')
+    }, room=room_id)
+
+@socketio.on('join_bracket')
+@profiled
+def handle_join_bracket(data):
+    bracket_id = data['bracket_id']
+    entrant_id = data.get('entrant_id')
+    
+    if bracket_id not in brackets:
+        emit('bracket_join_failed', {'error': 'Bracket not found'})
+        return
+    
+    bracket = brackets[bracket_id]
+    join_room(f'bracket_{bracket_id}')
+    
+    assignment = None
+    if entrant_id in bracket.entrants:
+        # Private room so match assignments only reach this entrant
+        join_room(f'entrant_{entrant_id}')
+        match = bracket.matches.get(bracket.entrants[entrant_id]['match_id'])
+        if match and match['status'] == 'playing':
+            player_id = next(pid for pid, eid in match['players'].items() if eid == entrant_id)
+            assignment = bracket.get_assignment(match, player_id)
+    
+    emit('bracket_joined', {
+        'bracket': bracket.get_bracket_info(),
+        'assignment': assignment
+    })
 
 @socketio.on('player_ready')
+@profiled
 def handle_player_ready(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -451,6 +2361,7 @@ def handle_player_ready(data):
         socketio.emit('room_update', game_rooms[room_id].get_room_info(), room=room_id)
 
 @socketio.on('start_game')
+@profiled
 def handle_start_game(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -474,20 +2385,26 @@ def handle_start_game(data):
                 socketio.emit('game_started', game_info, room=room_id)
 
 @socketio.on('game_move')
+@profiled
 def handle_game_move(data):
     room_id = data['room_id']
     player_id = data['player_id']
     moves = data['moves']
     
     if room_id in game_rooms and player_id in game_rooms[room_id].players:
+        seq = game_rooms[room_id].record_move(player_id, moves)
+        
         # Broadcast move count to all players in room
-        socketio.emit('opponent_move', {
+        outbound_queues.broadcast_move(room_id, {
             'player_id': player_id,
             'player_name': game_rooms[room_id].players[player_id]['name'],
-            'moves': moves
-        }, room=room_id)
+            'moves': moves,
+            'seq': seq,
+            'stats': game_rooms[room_id].get_player_stats(player_id)
+        })
 
 @socketio.on('player_move')
+@profiled
 def handle_player_move(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -496,20 +2413,22 @@ def handle_player_move(data):
     to_peg = data.get('to_peg')
     
     if room_id in game_rooms and player_id in game_rooms[room_id].players:
-        # Update player's move count in game state
-        if game_rooms[room_id].players[player_id].get('game_state'):
-            game_rooms[room_id].players[player_id]['game_state']['moves'] = moves
+        # Update player's move count in game state and the catch-up log
+        seq = game_rooms[room_id].record_move(player_id, moves, from_peg, to_peg)
         
         # Broadcast move details to all players in room
-        socketio.emit('opponent_move', {
+        outbound_queues.broadcast_move(room_id, {
             'player_id': player_id,
             'player_name': game_rooms[room_id].players[player_id]['name'],
             'moves': moves,
             'from_peg': from_peg,
-            'to_peg': to_peg
-        }, room=room_id)
+            'to_peg': to_peg,
+            'seq': seq,
+            'stats': game_rooms[room_id].get_player_stats(player_id)
+        })
 
 @socketio.on('game_finished')
+@profiled
 def handle_game_finished(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -523,6 +2442,7 @@ def handle_game_finished(data):
             
             game_end_data = {
                 'room_info': room.get_room_info(),
+                'stats': room.get_all_stats(),
                 'finisher': {
                     'player_id': player_id,
                     'player_name': player_name,
@@ -550,20 +2470,38 @@ def handle_game_finished(data):
                 })
             
             socketio.emit('game_ended', game_end_data, room=room_id)
+            
+            if room.game_finished:
+                report_bracket_result(room)
+
+@socketio.on('request_hint')
+@profiled
+def handle_request_hint(data):
+    room_id = data['room_id']
+    player_id = data['player_id']
+    
+    if room_id in game_rooms and player_id in game_rooms[room_id].players:
+        hint, error = get_hint(room_id, data.get('pegs'))
+        if error:
+            emit('hint_failed', {'error': error})
+        else:
+            emit('hint', hint)
 
 @socketio.on('set_disk_count')
+@profiled
 def handle_set_disk_count(data):
     room_id = data['room_id']
     player_id = data['player_id']
-    disk_count = data['disk_count']
+    disk_count = clamp_disk_count(data.get('disk_count'))
     
-    if room_id in game_rooms:
+    if room_id in game_rooms and disk_count is not None:
         room = game_rooms[room_id]
         if player_id == room.creator_id and not room.game_started:
             room.disk_count = disk_count
             socketio.emit('room_update', room.get_room_info(), room=room_id)
 
 @socketio.on('forfeit_game')
+@profiled
 def handle_forfeit_game(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -578,10 +2516,13 @@ def handle_forfeit_game(data):
                 'winner': winner_name,
                 'loser': loser_name,
                 'forfeit': True,
-                'room_info': room.get_room_info()
+                'room_info': room.get_room_info(),
+                'stats': room.get_all_stats()
             }, room=room_id)
+            report_bracket_result(room)
 
 @socketio.on('reset_game')
+@profiled
 def handle_reset_game(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -607,52 +2548,24 @@ def handle_reset_game(data):
             })
 
 @socketio.on('leave_room')
+@profiled
 def handle_leave_room(data):
     room_id = data['room_id']
     player_id = data['player_id']
     
     if room_id in game_rooms and player_id in game_rooms[room_id].players:
-        room = game_rooms[room_id]
-        player_name = room.players[player_id]['name']
-        
-        # If game is active, this counts as a forfeit
-        if room.game_started and not room.game_finished:
-            if room.forfeit_game(player_id):
-                winner_info = {
-                    'player_id': room.winner,
-                    'player_name': room.players[room.winner]['name']
-                }
-                socketio.emit('game_ended', {
-                    'winner': winner_info,
-                    'forfeit': True,
-                    'left_game': True,
-                    'room_info': room.get_room_info()
-                }, room=room_id)
-        
-        # Remove player from room
-        if room.remove_player(player_id):
-            # Room is empty, delete it
-            del game_rooms[room_id]
-        else:
-            # Notify remaining players
-            socketio.emit('player_left', {
-                'player_name': player_name,
-                'room_info': room.get_room_info()
-            }, room=room_id)
+        remove_player_from_room(room_id, player_id)
         
-        # Clean up player session
-        if player_id in player_sessions:
-            del player_sessions[player_id]
-            
-        # Clean up socket session
-        if request.sid in socket_sessions:
+        # Clean up socket session, unless the socket already moved to another seat
+        if socket_sessions.get(request.sid) == player_id:
             del socket_sessions[request.sid]
         
         # Remove from socket room
         leave_room(room_id)
-        emit('left_room', {'success': True})
+        emit('left_room', {'success': True, 'room_id': room_id})
 
 @socketio.on('join_team')
+@profiled
 def handle_join_team(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -676,6 +2589,7 @@ def handle_join_team(data):
             emit('team_join_failed', {'error': 'Team is full or invalid'})
 
 @socketio.on('set_game_mode')
+@profiled
 def handle_set_game_mode(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -688,18 +2602,12 @@ def handle_set_game_mode(data):
             room.game_mode = game_mode
             
             # Adjust max players based on mode
-            if game_mode == 'tournament':
-                room.max_players = max(3, min(8, max_players))
-            elif game_mode == 'team':
-                room.max_players = max(4, min(6, max_players))
-            elif game_mode == 'spectator':
-                room.max_players = 2
-            else:  # classic
-                room.max_players = 2
+            room.max_players = get_max_players(game_mode, max_players)
             
             socketio.emit('room_update', room.get_room_info(), room=room_id)
 
 @socketio.on('switch_to_spectator')
+@profiled
 def handle_switch_to_spectator(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -725,6 +2633,7 @@ def handle_switch_to_spectator(data):
         socketio.emit('room_update', room.get_room_info(), room=room_id)
 
 @socketio.on('switch_to_player')
+@profiled
 def handle_switch_to_player(data):
     room_id = data['room_id']
     player_id = data['player_id']
@@ -759,10 +2668,42 @@ def handle_switch_to_player(data):
         else:
             emit('player_switch_failed', {'error': 'Room is full or game started'})
 
+mark_startup('routes')
+
+if STATIC_BUNDLE:
+    build_static_bundle()
+    mark_startup('static_bundle')
+
+if STARTUP_PROFILE:
+    print('Startup profile:')
+    for phase, seconds in startup_profile.items():
+        print(f'  {phase:<22} {seconds * 1000:8.2f} ms')
+    print(f"  {'total':<22} {sum(startup_profile.values()) * 1000:8.2f} ms")
+
+def snapshot_and_exit(signum, frame):
+    # Deploys stop us with SIGTERM: save synchronously so the next process can resume every room
+    print(f'Saving {len(game_rooms)} rooms to {SNAPSHOT_PATH} before shutdown')
+    state_snapshotter.write()
+    sys.exit(0)
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     
+    # Restore only when serving, so tools importing this module don't pick up live rooms
+    if RESTORE_ON_BOOT:
+        restore_started = time.perf_counter()
+        restored_rooms = state_snapshotter.restore()
+        if restored_rooms:
+            print(f'Restored {restored_rooms} rooms from {SNAPSHOT_PATH} '
+                  f'in {(time.perf_counter() - restore_started) * 1000:.2f} ms')
+    
+    if STATE_SNAPSHOT_INTERVAL > 0:
+        socketio.start_background_task(run_periodic_snapshots)
+    
+    import signal
+    signal.signal(signal.SIGTERM, snapshot_and_exit)
+    
     socketio.run(app, 
                 debug=debug, 
                 host='0.0.0.0', 
@@ -13,6 +13,10 @@ class MultiplayerTowerOfHanoi {
         this.gameMode = 'classic';   // 'classic', 'tournament', 'team', 'spectator'
         this.maxPlayers = 2;
         this.opponentMoves = 0;
+        this.reconnectToken = null;  // Lets a new socket resume this seat after a drop
+        this.lastMoveSeq = 0;        // Last opponent_move sequence seen, for catch-up
+        this.bracketId = null;       // Set when playing through a /bracket/<id> link
+        this.entrantId = null;
         
         // Game state
         this.pegs = [[], [], []];
@@ -40,6 +44,13 @@ class MultiplayerTowerOfHanoi {
                 roomIdInput.value = roomMatch[1];
             }
         }
+
+        // Bracket entrants are seated by the server, match by match
+        const bracketMatch = urlPath.match(/\/bracket\/([a-zA-Z0-9]+)/);
+        if (bracketMatch) {
+            this.bracketId = bracketMatch[1];
+            this.entrantId = new URLSearchParams(window.location.search).get('entrant');
+        }
     }
 
     // Utility methods from original game
@@ -113,6 +124,8 @@ class MultiplayerTowerOfHanoi {
         const forfeitBtn = document.getElementById('forfeitBtn');
         const resetBtn = document.getElementById('resetBtn');
         const leaveGameBtn = document.getElementById('leaveGameBtn');
+        const hintBtn = document.getElementById('hintBtn');
+        if (hintBtn) hintBtn.addEventListener('click', () => this.requestHint());
         if (forfeitBtn) forfeitBtn.addEventListener('click', () => this.forfeitGame());
         if (resetBtn) resetBtn.addEventListener('click', () => this.resetGame());
         if (leaveGameBtn) leaveGameBtn.addEventListener('click', () => this.leaveRoom());
@@ -145,10 +158,50 @@ class MultiplayerTowerOfHanoi {
     }
 
     initializeSocketEvents() {
+        this.socket.on('connect', () => {
+            // socket.io reconnects with a new sid, so re-bind our seat
+            if (this.reconnectToken) {
+                this.socket.emit('resume_session', {
+                    reconnect_token: this.reconnectToken,
+                    last_seq: this.lastMoveSeq
+                });
+            }
+            if (this.bracketId) {
+                this.socket.emit('join_bracket', {
+                    bracket_id: this.bracketId,
+                    entrant_id: this.entrantId
+                });
+            }
+        });
+
         this.socket.on('room_joined', (data) => {
+            if (data.reconnect_token) {
+                this.reconnectToken = data.reconnect_token;
+            }
             this.updateRoomInfo(data);
         });
 
+        this.socket.on('session_resumed', (data) => {
+            this.onSessionResumed(data);
+        });
+
+        this.socket.on('resume_failed', (data) => {
+            this.reconnectToken = null;
+            this.showMessage('Your session expired: ' + data.error, 'error');
+        });
+
+        this.socket.on('player_disconnected', (data) => {
+            if (data.player_id !== this.playerId) {
+                this.showMessage(`${data.player_name} lost connection, holding their seat for ${data.grace_seconds}s`, 'warning');
+            }
+        });
+
+        this.socket.on('player_reconnected', (data) => {
+            if (data.player_id !== this.playerId) {
+                this.showMessage(`${data.player_name} reconnected`, 'info');
+            }
+        });
+
         this.socket.on('room_update', (data) => {
             this.updateRoomInfo(data);
         });
@@ -161,6 +214,14 @@ class MultiplayerTowerOfHanoi {
             this.updateOpponentMoves(data);
         });
 
+        this.socket.on('room_snapshot', (data) => {
+            // Sent instead of individual moves while our connection is backed up
+            Object.entries(data.players).forEach(([playerId, info]) => {
+                this.updateOpponentMoves({ player_id: playerId, moves: info.moves, stats: info.stats });
+            });
+            this.lastMoveSeq = Math.max(this.lastMoveSeq, data.seq);
+        });
+
         this.socket.on('game_ended', (data) => {
             this.onGameEnded(data);
         });
@@ -178,6 +239,22 @@ class MultiplayerTowerOfHanoi {
         });
 
         this.socket.on('left_room', (data) => {
+            if (data.room_id && data.room_id !== this.roomId) {
+                return;  // A previous bracket match, we already moved on
+            }
+            this.onLeftRoom(data);
+        });
+
+        this.socket.on('room_closed', (data) => {
+            this.reconnectToken = null;
+            if (this.bracketId && (data.reason === 'walkover' || data.reason === 'match_over')) {
+                // Stay on the bracket page for the next assignment
+                if (data.reason === 'walkover') {
+                    this.showMessage('Your opponent did not show up, you advance', 'success');
+                }
+                return;
+            }
+            alert('This room was closed by the server.');
             this.onLeftRoom(data);
         });
 
@@ -188,6 +265,30 @@ class MultiplayerTowerOfHanoi {
         this.socket.on('player_switch_failed', (data) => {
             alert('Failed to switch role: ' + data.error);
         });
+
+        this.socket.on('hint', (data) => {
+            this.onHint(data);
+        });
+
+        this.socket.on('hint_failed', (data) => {
+            this.showMessage('Hint unavailable: ' + data.error, 'error');
+        });
+
+        this.socket.on('bracket_joined', (data) => {
+            this.onBracketJoined(data);
+        });
+
+        this.socket.on('bracket_join_failed', (data) => {
+            this.showMessage('Could not join bracket: ' + data.error, 'error');
+        });
+
+        this.socket.on('match_assigned', (data) => {
+            this.onMatchAssigned(data);
+        });
+
+        this.socket.on('bracket_finished', (data) => {
+            this.showMessage(`${data.champion} won the tournament!`, 'success');
+        });
     }
 
     async createRoom() {
@@ -330,6 +431,59 @@ class MultiplayerTowerOfHanoi {
         }
     }
 
+    onBracketJoined(data) {
+        const entrant = data.bracket.standings.find(e => e.entrant_id === this.entrantId);
+        if (!entrant) {
+            this.showMessage('Watching bracket ' + data.bracket.bracket_id, 'info');
+            return;
+        }
+        this.playerName = entrant.name;
+        this.hideRoomModal();
+
+        if (data.assignment) {
+            this.onMatchAssigned(data.assignment);
+        } else if (data.bracket.finished) {
+            this.showMessage(`${data.bracket.champion} won the tournament!`, 'success');
+        } else if (entrant.eliminated) {
+            this.showMessage('You have been eliminated', 'info');
+        } else {
+            this.showMessage('Waiting for your next match...', 'info');
+        }
+    }
+
+    onMatchAssigned(assignment) {
+        if (assignment.room_id === this.roomId && assignment.player_id === this.playerId) {
+            return;  // Already seated; join_bracket repeats the live assignment on reconnect
+        }
+
+        if (this.roomId && this.playerId) {
+            // Done with the previous match: stop getting its broadcasts
+            this.socket.emit('leave_room', {
+                room_id: this.roomId,
+                player_id: this.playerId
+            });
+        }
+
+        // The server created the room with our seat in it, so skip /join-room
+        this.roomId = assignment.room_id;
+        this.playerId = assignment.player_id;
+        this.isRoomCreator = assignment.host;
+        this.playerRole = 'player';
+        this.gameStarted = false;
+        this.gameFinished = false;
+        this.reconnectToken = null;
+        this.lastMoveSeq = 0;
+
+        this.joinGameRoom();
+        this.hideRoomModal();
+        const gameArea = document.getElementById('gameArea');
+        if (gameArea) {
+            gameArea.classList.add('hidden');
+        }
+        this.showLobby();
+        this.showMessage(`Round ${assignment.round}: you play ${assignment.opponent}`, 'info');
+    }
+
     joinGameRoom() {
         this.socket.emit('join_game_room', {
             room_id: this.roomId,
@@ -974,6 +1128,10 @@ class MultiplayerTowerOfHanoi {
 
     // Socket event handlers
     updateOpponentMoves(data) {
+        if (data.seq) {
+            this.lastMoveSeq = Math.max(this.lastMoveSeq, data.seq);
+        }
+        
         // Don't update for own moves
         if (data.player_id === this.playerId) {
             return;
@@ -1057,6 +1215,23 @@ class MultiplayerTowerOfHanoi {
         }, 2000);
     }
 
+    onSessionResumed(data) {
+        this.updateRoomInfo(data.room_info);
+        
+        // Apply the latest move counts we missed while offline
+        const catchUp = data.catch_up;
+        Object.entries(catchUp.players).forEach(([playerId, info]) => {
+            this.updateOpponentMoves({ player_id: playerId, moves: info.moves });
+        });
+        this.lastMoveSeq = catchUp.seq;
+        
+        if (data.room_info.game_finished && this.gameStarted && !this.gameFinished) {
+            this.showMessage('The game ended while you were offline', 'warning');
+        } else {
+            this.showMessage('Reconnected', 'success');
+        }
+    }
+
     onPlayerLeft(data) {
         this.showMessage(`${data.player_name} left the game`, 'warning');
         
@@ -1181,6 +1356,28 @@ class MultiplayerTowerOfHanoi {
         }
     }
 
+    requestHint() {
+        if (this.gameStarted && !this.gameFinished && this.roomId && this.playerId) {
+            this.socket.emit('request_hint', {
+                room_id: this.roomId,
+                player_id: this.playerId,
+                pegs: this.pegs.map(peg => peg.map(disk => disk.size))
+            });
+        }
+    }
+
+    onHint(data) {
+        if (!data.best_move) {
+            this.showMessage('Puzzle already solved!', 'info');
+            return;
+        }
+        const pegNames = ['left', 'middle', 'right'];
+        this.showMessage(
+            `Hint: move the top disk from the ${pegNames[data.best_move.from_peg]} peg to the ${pegNames[data.best_move.to_peg]} peg (${data.moves_to_go} moves to go)`,
+            'info'
+        );
+    }
+
     newGame() {
         if (confirm('Are you sure you want to start a new game? This will leave the current room.')) {
             this.leaveRoom();
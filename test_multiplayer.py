@@ -1,3 +1,6 @@
+import os
+import gzip
+import time
 import requests
 import json
 
@@ -123,6 +126,232 @@ def test_join_room():
     else:
         print(f"❌ Failed to join as spectator: {response.text}")
 
+def test_hint():
+    """Test the hint endpoint and its cache counters"""
+    print("\n" + "="*50)
+    print("🧪 TESTING HINTS")
+    print("="*50)
+    
+    base_url = "http://localhost:5000"
+    
+    response = requests.post(f"{base_url}/create-room", 
+                           json={
+                               "player_name": "HintPlayer",
+                               "disk_count": 3,
+                               "game_mode": "classic"
+                           })
+    
+    if response.status_code != 200:
+        print("❌ Failed to create test room for hints")
+        return
+    
+    room_id = response.json()['room_id']
+    
+    # Ask twice for the starting position, the second answer should come from the cache
+    for attempt in range(2):
+        response = requests.post(f"{base_url}/hint", 
+                               json={
+                                   "room_id": room_id,
+                                   "pegs": [[3, 2, 1], [], []]
+                               })
+        
+        data = response.json()
+        if data.get('success') and data['moves_to_go'] == 7 and data['best_move'] == {'from_peg': 0, 'to_peg': 2}:
+            print(f"✅ Hint {attempt + 1}: move {data['best_move']}, {data['moves_to_go']} moves to go")
+        else:
+            print(f"❌ Unexpected hint: {response.text}")
+    
+    stats = requests.get(f"{base_url}/hint-stats").json()
+    print(f"✅ Hint cache: {stats['hits']} hits, {stats['misses']} misses")
+
+def test_state_index():
+    """Test that hints from the precomputed state index match known shortest distances"""
+    print("\n" + "="*50)
+    print("🧪 TESTING STATE INDEX")
+    print("="*50)
+    
+    base_url = "http://localhost:5000"
+    
+    response = requests.post(f"{base_url}/create-room", 
+                           json={
+                               "player_name": "IndexPlayer",
+                               "disk_count": 4,
+                               "game_mode": "classic"
+                           })
+    
+    if response.status_code != 200:
+        print("❌ Failed to create test room for the state index")
+        return
+    
+    room_id = response.json()['room_id']
+    
+    # (pegs, moves to go, best move or None when any optimal move will do)
+    positions = [
+        ([[4, 3, 2, 1], [], []], 15, {'from_peg': 0, 'to_peg': 1}),
+        ([[4], [3, 2, 1], []], 8, {'from_peg': 0, 'to_peg': 2}),
+        ([[4], [], [3, 2, 1]], 15, None),
+        ([[1], [], [4, 3, 2]], 1, {'from_peg': 0, 'to_peg': 2}),
+        ([[], [], [4, 3, 2, 1]], 0, None)
+    ]
+    
+    for pegs, moves_to_go, best_move in positions:
+        response = requests.post(f"{base_url}/hint", 
+                               json={
+                                   "room_id": room_id,
+                                   "pegs": pegs
+                               })
+        
+        data = response.json()
+        if data.get('success') and data['moves_to_go'] == moves_to_go and (best_move is None or data['best_move'] == best_move):
+            print(f"✅ {pegs}: {data['moves_to_go']} moves to go")
+        else:
+            print(f"❌ Unexpected answer for {pegs}: {response.text}")
+    
+    # A disk on top of a smaller one is not a reachable position
+    response = requests.post(f"{base_url}/hint", 
+                           json={
+                               "room_id": room_id,
+                               "pegs": [[3], [4], [1, 2]]
+                           })
+    
+    if not response.json().get('success'):
+        print("✅ Invalid position correctly rejected")
+    else:
+        print(f"❌ Invalid position not rejected: {response.text}")
+
+def test_brackets():
+    """Test bracket byes and advancement (needs the server's ADMIN_TOKEN in the environment)"""
+    print("\n" + "="*50)
+    print("🧪 TESTING BRACKETS")
+    print("="*50)
+    
+    base_url = "http://localhost:5000"
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        print("⚠️ Skipped: set ADMIN_TOKEN to the server's admin token")
+        return
+    
+    # 5 entrants fill an 8-slot bracket: seeds 1-3 get first-round byes
+    response = requests.post(f"{base_url}/admin/brackets", 
+                           headers={"X-Admin-Token": admin_token},
+                           json={
+                               "entrants": ["Seed1", "Seed2", "Seed3", "Seed4", "Seed5"],
+                               "format": "single_elimination",
+                               "disk_count": 3
+                           })
+    
+    if response.status_code != 200:
+        print(f"❌ Failed to create bracket: {response.text}")
+        return
+    
+    data = response.json()
+    print(f"✅ Bracket created: {data['bracket_id']} with {data['total_rounds']} rounds")
+    
+    bracket = requests.get(f"{base_url}/brackets/{data['bracket_id']}").json()
+    matches = {m['match_id']: m for m in bracket['matches']}
+    
+    byes = [m for m in matches.values() if m['round'] == 1 and None in m['entrants']]
+    if len(byes) == 3 and all(m['status'] == 'finished' for m in byes):
+        print(f"✅ Byes advanced: {sorted(m['winner'] for m in byes)}")
+    else:
+        print(f"❌ Unexpected byes: {byes}")
+    
+    if matches['r1m1']['entrants'] == ['Seed4', 'Seed5'] and matches['r1m1']['status'] == 'playing':
+        print("✅ Seed4 vs Seed5 is playing")
+    else:
+        print(f"❌ Unexpected first-round match: {matches['r1m1']}")
+    
+    # Both feeders were byes, so this match starts straight away
+    if matches['r2m1']['entrants'] == ['Seed2', 'Seed3'] and matches['r2m1']['status'] == 'playing':
+        print("✅ Seed2 vs Seed3 advanced to round 2 and started")
+    else:
+        print(f"❌ Unexpected second-round match: {matches['r2m1']}")
+    
+    # Still waiting on the Seed4 vs Seed5 winner
+    if matches['r2m0']['entrants'] == ['Seed1', None] and matches['r2m0']['status'] == 'waiting':
+        print("✅ Seed1 is waiting for its opponent")
+    else:
+        print(f"❌ Unexpected second-round match: {matches['r2m0']}")
+
+def test_snapshot():
+    """Test that a state snapshot saves and restores live rooms (needs the server's ADMIN_TOKEN in the environment)"""
+    print("\n" + "="*50)
+    print("🧪 TESTING STATE SNAPSHOT")
+    print("="*50)
+    
+    base_url = "http://localhost:5000"
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        print("⚠️ Skipped: set ADMIN_TOKEN to the server's admin token")
+        return
+    
+    response = requests.post(f"{base_url}/create-room", 
+                           json={
+                               "player_name": "SnapshotHost",
+                               "disk_count": 5,
+                               "game_mode": "classic"
+                           })
+    room = response.json()
+    requests.post(f"{base_url}/join-room", 
+                  json={
+                      "room_id": room['room_id'],
+                      "player_name": "SnapshotGuest"
+                  })
+    
+    requested_at = time.time()
+    response = requests.post(f"{base_url}/admin/snapshot", headers={"X-Admin-Token": admin_token})
+    if response.status_code != 200:
+        print(f"❌ Failed to start snapshot: {response.text}")
+        return
+    
+    # The snapshot is written in the background; wait for this run's result
+    result = None
+    for _ in range(50):
+        status = requests.get(f"{base_url}/admin/snapshot", headers={"X-Admin-Token": admin_token}).json()
+        last = status.get('last_result')
+        if not status['in_progress'] and last and last['started_at'] >= requested_at - 1:
+            result = last
+            break
+        time.sleep(0.1)
+    
+    if not result or not result['success']:
+        print(f"❌ Snapshot did not complete: {result}")
+        return
+    print(f"✅ Snapshot written by {result['method']} in {result['duration_seconds']}s")
+    
+    # Reading the file back only works when the server runs on this machine
+    if not os.path.exists(result['path']):
+        print(f"⚠️ Snapshot file {result['path']} not readable here, skipped round-trip check")
+        return
+    
+    with open(result['path'], 'rb') as f:
+        header = f.read(5)
+        state = json.loads(gzip.decompress(f.read()))
+    
+    saved = next((r for r in state['rooms'] if r['room_id'] == room['room_id']), None)
+    if header[:4] == b'HNSS' and saved:
+        print(f"✅ Room {room['room_id']} is in the snapshot ({len(state['rooms'])} rooms)")
+    else:
+        print(f"❌ Room {room['room_id']} missing from snapshot")
+        return
+    
+    # Restore into a fresh copy of the server state, as a restarted worker would
+    os.environ.setdefault('STATIC_BUNDLE', 'False')
+    import server
+    server.StateSnapshotter(result['path']).restore()
+    
+    restored = server.game_rooms.get(room['room_id'])
+    names = sorted(p['name'] for p in restored.players.values()) if restored else []
+    if restored and restored.disk_count == 5 and names == ['SnapshotGuest', 'SnapshotHost']:
+        print(f"✅ Room {room['room_id']} restored with players {names}")
+    else:
+        print(f"❌ Room missing or changed after restore: {names}")
+    
+    if server.player_sessions.get(room['player_id']) == room['room_id']:
+        print("✅ Player session restored with the room")
+    else:
+        print("❌ Player session missing after restore")
+
 if __name__ == "__main__":
     print("🎮 TOWER OF HANOI MULTIPLAYER SERVER TEST")
     print("="*50)
@@ -132,6 +361,10 @@ if __name__ == "__main__":
     try:
         test_room_creation()
         test_join_room()
+        test_hint()
+        test_state_index()
+        test_brackets()
+        test_snapshot()
         print("\n" + "="*50)
         print("✅ ALL TESTS COMPLETED!")
         print("="*50)